@@ -6,17 +6,25 @@ import os
 import sys
 import subprocess
 import json
-
-from PIL import Image, ImageTk, ImageEnhance
+import time
+import queue
+import threading
+from collections import deque
 
 # Import from our new modules
 from config import MODIFIER_CONFIG
 from language import LANGUAGES
 from scenario_logic import (
-    load_settings, save_settings, parse_scenario_file, 
-    create_variant_file, get_default_profile, 
-    get_base_scenario_name, calculate_target_filename
+    load_settings, save_settings, load_preview, SCENARIO_CACHE, PREVIEW_CACHE,
+    get_default_profile, get_target_bots, build_tasks, count_combinations
 )
+from scenario_index import SCENARIO_INDEX
+from scenario_search import ScenarioSearch
+from generation_engine import ScenarioJob, plan_generation, run_generation, naming_configs
+from variant_writer import WriteStats
+from timing import TIMINGS, span
+from manifest import open_manifest
+from prefetch import Prefetcher, neighbour_order
 
 # --- VISUAL CONSTANTS ---
 TRANSPARENT_KEY = "#000001" 
@@ -28,16 +36,51 @@ ENTRY_BG = "#2e2e2e"
 ACCENT_COLOR = "#ff7eb6"  # Hot Pink
 MATRIX_GREEN = "#00ff41"  # Matrix Green
 
+GENERATION_POLL_MS = 33   # ~30 fps for draining generation progress
+FOLDER_POLL_MS = 2000     # directory mtime check for files added by the game or other tools
+LOG_FLUSH_MS = 50         # log panel redraw interval
+LOG_MAX_LINES = 5000      # lines kept in the log panel (and in the pending buffer)
+BG_FRAME_MS = 16          # zoom/brightness input is coalesced into at most one fast frame per display refresh
+BG_IDLE_MS = 150          # quiet time before the full-quality (LANCZOS) frame is rendered
+WINDOW_SYNC_MS = 16       # <Configure> bursts are folded into one ui_window geometry update per frame
+
 class RedirectText:
-    def __init__(self, text_widget): self.text_space = text_widget
-    def write(self, string): 
-        try:
-            self.text_space.config(state='normal')
-            self.text_space.insert('end', string)
-            self.text_space.see('end')
-            self.text_space.config(state='disabled')
+    """
+    stdout/stderr sink for the log panel. write() only appends to an in-memory buffer, so it is cheap
+    and safe from any thread; the Tk thread moves pending text into the widget every LOG_FLUSH_MS.
+    Both the pending buffer and the widget keep at most LOG_MAX_LINES lines.
+    """
+    def __init__(self, text_widget):
+        self.text_space = text_widget
+        self.pending = deque(maxlen=LOG_MAX_LINES * 2)   # print() writes the text and its newline separately
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.text_space.after(LOG_FLUSH_MS, self._pump)
+
+    def write(self, string):
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen: self.dropped += 1
+            self.pending.append(string)
+
+    def flush(self): pass   # the timer does the real flushing
+
+    def _pump(self):
+        with self.lock:
+            chunks, dropped = list(self.pending), self.dropped
+            self.pending.clear(); self.dropped = 0
+        if chunks or dropped:
+            text = "".join(chunks)
+            if dropped: text = f"... {dropped} earlier log writes dropped ...\n" + text
+            try:
+                self.text_space.config(state='normal')
+                self.text_space.insert('end', text)
+                excess = int(self.text_space.index('end-1c').split('.')[0]) - LOG_MAX_LINES
+                if excess > 0: self.text_space.delete('1.0', f'{excess + 1}.0')
+                self.text_space.see('end')
+                self.text_space.config(state='disabled')
+            except tk.TclError: return   # widget destroyed, stop pumping
+        try: self.text_space.after(LOG_FLUSH_MS, self._pump)
         except tk.TclError: pass
-    def flush(self): pass
 
 class ScrollableFrame(ttk.Frame):
     def __init__(self, container, *args, **kwargs):
@@ -65,20 +108,90 @@ class ScrollableFrame(ttk.Frame):
         self.scrollbar_y.grid(row=0, column=1, sticky="ns")
         self.scrollbar_x.grid(row=1, column=0, sticky="ew")
 
-class OverwriteDialog(tk.Toplevel):
-    def __init__(self, parent, filename, current_lang):
+class VirtualListbox(ttk.Frame):
+    """
+    Listbox that only materializes the visible rows of a (possibly huge) item list.
+    Exposes the part of the tk.Listbox API the app uses: curselection, get, selection_clear.
+    """
+    def __init__(self, container, height=6, on_select=None, **listbox_kwargs):
+        super().__init__(container)
+        self.items = []; self.top = 0; self.selected = None
+        self.rows = height; self.on_select = on_select
+        self.listbox = tk.Listbox(self, height=height, exportselection=False, selectmode="browse", activestyle="none", **listbox_kwargs)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"): self.listbox.bind(seq, self._on_wheel)
+        self.listbox.bind("<Up>", lambda e: self._move(-1)); self.listbox.bind("<Down>", lambda e: self._move(1))
+        self.listbox.bind("<Prior>", lambda e: self._move(-self.rows)); self.listbox.bind("<Next>", lambda e: self._move(self.rows))
+        self.listbox.bind("<Home>", lambda e: self._move(-len(self.items))); self.listbox.bind("<End>", lambda e: self._move(len(self.items)))
+
+    def set_items(self, items, keep_view=False):
+        """Replaces the model. keep_view keeps the scroll position and the selected item (by value)."""
+        selected_item = self.items[self.selected] if keep_view and self.selected is not None else None
+        self.items = items; self.selected = None
+        if not keep_view: self.top = 0
+        elif selected_item is not None:
+            try: self.selected = items.index(selected_item)
+            except ValueError: pass
+        self._render()
+
+    def _render(self):
+        n = len(self.items)
+        self.top = max(0, min(self.top, n - self.rows))
+        visible = self.items[self.top:self.top + self.rows]
+        self.listbox.delete(0, tk.END)
+        if visible: self.listbox.insert(0, *visible)
+        if self.selected is not None and self.top <= self.selected < self.top + self.rows:
+            self.listbox.selection_set(self.selected - self.top)
+        if n: self.scrollbar.set(self.top / n, (self.top + len(visible)) / n)
+        else: self.scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto": self.top = int(float(args[1]) * len(self.items))
+        elif args[0] == "scroll": self.top += int(args[1]) * (self.rows if args[2] == "pages" else 1)
+        self._render()
+
+    def _on_wheel(self, event):
+        step = -3 if (event.num == 4 or event.delta > 0) else 3
+        self.top += step; self._render()
+        return "break"
+
+    def _on_listbox_select(self, event=None):
+        rows = self.listbox.curselection()
+        if not rows: return
+        self.selected = self.top + rows[0]
+        if self.on_select: self.on_select()
+
+    def _move(self, step):
+        if not self.items: return "break"
+        current = self.selected if self.selected is not None else (self.top - 1 if step > 0 else self.top + self.rows)
+        self.selected = max(0, min(len(self.items) - 1, current + step))
+        if self.selected < self.top: self.top = self.selected
+        elif self.selected >= self.top + self.rows: self.top = self.selected - self.rows + 1
+        self._render()
+        if self.on_select: self.on_select()
+        return "break"
+
+    def curselection(self): return (self.selected,) if self.selected is not None else ()
+    def get(self, index): return self.items[index]
+    def selection_clear(self, *args):
+        self.selected = None; self.listbox.selection_clear(0, tk.END)
+
+class GenerationPlanDialog(tk.Toplevel):
+    def __init__(self, parent, plan, current_lang):
         super().__init__(parent);
         lang = current_lang
-        self.title(LANGUAGES[lang]['dialog_overwrite_title']); self.result = "no"
+        self.title(LANGUAGES[lang]['dialog_overwrite_title']); self.result = "cancel"
         self.configure(bg=ENTRY_BG)
-        message = LANGUAGES[lang]['dialog_overwrite_text'].format(filename=filename)
+        message = LANGUAGES[lang]['dialog_plan_text'].format(new=plan.count("new"), overwrite=plan.count("overwrite"), incompatible=plan.count("incompatible"))
         lbl = ttk.Label(self, text=message, wraplength=350, justify='center', background=ENTRY_BG)
         lbl.pack(padx=20, pady=20)
         btn_frame = ttk.Frame(self, style="Opaque.TFrame"); btn_frame.pack(padx=10, pady=10)
-        ttk.Button(btn_frame, text="Yes", command=lambda: self.set_result_and_close("yes")).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text="No", command=lambda: self.set_result_and_close("no")).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text="Yes to All", command=lambda: self.set_result_and_close("yes_all")).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text="No to All", command=lambda: self.set_result_and_close("no_all")).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Overwrite", command=lambda: self.set_result_and_close("overwrite")).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Skip Existing", command=lambda: self.set_result_and_close("skip")).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text=LANGUAGES[lang]['button_cancel'], command=lambda: self.set_result_and_close("cancel")).pack(side="left", padx=5)
         self.transient(parent); self.grab_set(); self.wait_window(self)
     def set_result_and_close(self, result): self.result = result; self.destroy()
 
@@ -86,7 +199,7 @@ class VariantGeneratorApp:
     def __init__(self, root):
         self.root = root
         self.ui_ready = False
-        self.settings = load_settings()
+        with span("app.settings"): self.settings = load_settings()
         
         # State
         self.bg_edit_mode = False
@@ -121,32 +234,45 @@ class VariantGeneratorApp:
         self.active_profile_name = self.settings["last_active_profile"]
         if self.active_profile_name not in self.settings["profiles"]: self.active_profile_name = list(self.settings["profiles"].keys())[0]
         
-        self.variant_configs = {}; self.loaded_scenario_data = None; self.is_edit_mode = False; self.checkbox_vars = {}
-        self.all_scenarios = []; self._after_id = None
+        self.variant_configs = {}; self.loaded_scenario_data = None; self.is_edit_mode = False; self.checkbox_vars = {}; self.composite_vars = {}
+        self.scenario_search = ScenarioSearch(); self._after_id = None; self._selecting_from_list = False; self.bot_grid_names = None
+        self.prefetcher = Prefetcher(load_preview)
+        # Folder scans and background decodes run on worker threads and report through this queue
+        self.background_events = queue.Queue(); self.background_tasks = 0; self.scan_id = 0; self.bg_request = 0
+        self.scanned_folder = None; self.folder_mtime_ns = None; self.folder_listing = False
+        self.generation_queue = None; self.cancel_event = None
         self.bot_selection_vars = {} 
         self.bg_image_ref = None
         self.bg_image_id = None 
+        self.bg_renderer = None; self.bg_shown_key = None; self.bg_frame_after = None; self.bg_idle_after = None
+        # Window sync: pending after() id, last applied geometry, burst start, and counters for debugging
+        self.sync_after = None; self.synced_geometry = None; self.sync_burst_start = None
+        self.sync_stats = {"events": 0, "ignored": 0, "updates": 0, "unchanged": 0, "lifts": 0, "max_latency_ms": 0.0}
         
         default_font = font.nametofont("TkDefaultFont")
         default_font.configure(family="Consolas", size=10)
         self.header_font = font.Font(family="Consolas", size=11, weight="bold")
         
-        self._configure_styles()
-        self._create_widgets()
+        # Spans are recorded only with main.py --profile-startup
+        with span("app.widgets"):
+            self._configure_styles()
+            self._create_widgets()
         
         if "background_path" in self.settings:
-            self._apply_background_image(self.settings["background_path"], reset_view=False)
+            with span("app.background"): self._load_background_async(self.settings["background_path"])
             
-        self._load_profile(self.active_profile_name)
-        self._populate_scenario_list()
+        with span("app.profile"): self._load_profile(self.active_profile_name)
+        with span("app.scan"): self._populate_scenario_list()
         self._update_ui_text()
         
-        sys.stdout = RedirectText(self.log_widget); sys.stderr = RedirectText(self.log_widget)
+        self.log_sink = RedirectText(self.log_widget)
+        sys.stdout = self.log_sink; sys.stderr = self.log_sink
         print("Application started. Load a scenario to begin.")
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
         
         self.ui_ready = True
         self._force_initial_geometry()
+        self.root.after(FOLDER_POLL_MS, self._poll_folder)
 
     def _toggle_bg_edit(self):
         self.bg_edit_mode = not self.bg_edit_mode
@@ -178,23 +304,35 @@ class VariantGeneratorApp:
         scale_multiplier = 0.9 if (event.num == 5 or event.delta < 0) else 1.1
         new_scale = self.bg_scale * scale_multiplier
         if 0.1 < new_scale < 5.0:
-            self.bg_scale = new_scale; self._render_bg_image()
+            self.bg_scale = new_scale; self._request_bg_render()
     def _on_brightness_change(self, val):
-        self.bg_brightness = float(val); self._render_bg_image()
-    def _render_bg_image(self):
-        if not self.raw_bg_image: return
-        orig_w, orig_h = self.raw_bg_image.size
-        new_w = int(orig_w * self.bg_scale); new_h = int(orig_h * self.bg_scale)
+        self.bg_brightness = float(val)
+        if self.raw_bg_image: self._request_bg_render()
+    def _request_bg_render(self):
+        # Bursts of wheel ticks / slider moves: one fast frame per BG_FRAME_MS, then one LANCZOS frame when idle
+        if self.bg_frame_after is None: self.bg_frame_after = self.root.after(BG_FRAME_MS, self._render_bg_frame)
+        if self.bg_idle_after is not None: self.root.after_cancel(self.bg_idle_after)
+        self.bg_idle_after = self.root.after(BG_IDLE_MS, self._render_bg_final)
+    def _render_bg_frame(self): self.bg_frame_after = None; self._render_bg_image(fast=True)
+    def _render_bg_final(self): self.bg_idle_after = None; self._render_bg_image()
+    def _render_bg_image(self, final_img=None, fast=False, final_key=None):
+        # final_img: the frame already rendered on a worker thread (startup), for final_key = render_key(scale, brightness)
+        if not self.raw_bg_image or not self.bg_renderer: return
+        from PIL import ImageTk   # only needed once a background image is set
+        from background_renderer import render_key
+        key = render_key(self.bg_scale, self.bg_brightness) + (fast,)
+        shown_key = final_key + (False,) if final_img is not None else key
+        if self.bg_image_id and shown_key == self.bg_shown_key: return
         try:
-            resized = self.raw_bg_image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            enhancer = ImageEnhance.Brightness(resized)
-            final_img = enhancer.enhance(self.bg_brightness)
-            self.bg_image_ref = ImageTk.PhotoImage(final_img)
+            if final_img is None: final_img = self.bg_renderer.render(self.bg_scale, self.bg_brightness, fast)
+            self.bg_image_ref = ImageTk.PhotoImage(final_img); self.bg_shown_key = shown_key
             if self.bg_image_id: self.bg_canvas.itemconfig(self.bg_image_id, image=self.bg_image_ref)
             else:
                 cx = self.root.winfo_width() // 2; cy = self.root.winfo_height() // 2
                 self.bg_image_id = self.bg_canvas.create_image(cx, cy, image=self.bg_image_ref, anchor="center")
         except Exception: pass
+        # The slider moved while the worker was rendering: catch up with the current settings
+        if shown_key != key: self._request_bg_render()
 
     def _force_initial_geometry(self):
         self.ui_window.update_idletasks() 
@@ -225,14 +363,40 @@ class VariantGeneratorApp:
 
 
     def _sync_windows(self, event=None):
+        # <Configure> handler: the root's bindtags also deliver every child widget's Configure, and a drag
+        # sends dozens per frame. Only the root's own events count, and they just schedule one update.
         if not self.ui_ready: return 
+        if event is not None and event.widget is not self.root: self.sync_stats["ignored"] += 1; return
+        self.sync_stats["events"] += 1
+        if self.sync_after is None:
+            self.sync_burst_start = time.perf_counter()
+            self.sync_after = self.root.after(WINDOW_SYNC_MS, self._apply_window_sync)
+
+    def _apply_window_sync(self, lift=False):
+        """Moves ui_window over root if the geometry changed. lift=True after the UI was hidden or the root (re)mapped."""
+        if self.sync_after is not None: self.root.after_cancel(self.sync_after); self.sync_after = None
+        if not self.ui_ready: return
+        stats = self.sync_stats
         try:
-            x = self.root.winfo_rootx(); y = self.root.winfo_rooty()
-            w = self.root.winfo_width(); h = self.root.winfo_height()
-            self.ui_window.geometry(f"{w}x{h}+{x}+{y}"); self.ui_window.lift()
+            geometry = f"{self.root.winfo_width()}x{self.root.winfo_height()}+{self.root.winfo_rootx()}+{self.root.winfo_rooty()}"
+            if geometry != self.synced_geometry:
+                self.ui_window.geometry(geometry); self.synced_geometry = geometry; stats["updates"] += 1
+            else: stats["unchanged"] += 1
+            # ui_window is transient for root, so it stays above it while moving; restacking is only needed after a remap
+            if lift: self.ui_window.lift(); stats["lifts"] += 1
         except Exception: pass
+        if self.sync_burst_start is not None:
+            latency = time.perf_counter() - self.sync_burst_start; self.sync_burst_start = None
+            stats["max_latency_ms"] = max(stats["max_latency_ms"], round(latency * 1000, 2))
+            if TIMINGS.enabled: TIMINGS.add("gui.sync", latency)
 
-    def _sync_map(self, event): self.ui_window.deiconify(); self._sync_windows()
+    def _window_sync_stats_text(self):
+        s = self.sync_stats
+        return f"Window sync: {s['events']} events ({s['ignored']} child events ignored) -> {s['updates']} updates, {s['unchanged']} unchanged, {s['lifts']} lifts, max latency {s['max_latency_ms']} ms"
+
+    def _sync_map(self, event):
+        if event.widget is not self.root: return
+        self.ui_window.deiconify(); self._apply_window_sync(lift=True)
     def _sync_unmap(self, event): self.ui_window.withdraw()
 
     def _update_ui_text(self):
@@ -264,6 +428,7 @@ class VariantGeneratorApp:
         self.label_timescale.config(text=lang["stats_timescale"])
         self.label_duration.config(text=lang["stats_duration"])
         self.frame3.config(text=lang["frame_variants"])
+        self.cancel_button.config(text=lang["button_cancel"])
         self.edit_button.config(text=lang["button_edit_values"] if not self.is_edit_mode else lang["button_save_values"])
         self.log_frame.config(text=lang["frame_log"])
         if hasattr(self, 'bot_selection_frame'):
@@ -277,6 +442,7 @@ class VariantGeneratorApp:
                 widgets['header_label'].config(text=f"{display_name} Variants")
                 widgets['btn_frame'].winfo_children()[0].config(text=lang["button_select_all"])
                 widgets['btn_frame'].winfo_children()[1].config(text=lang["button_deselect_all"])
+                widgets['combine_check'].config(text=lang["checkbox_combine"])
 
     def _style_checkbox_dynamic(self, cb, var):
         def update_color(*args):
@@ -290,7 +456,7 @@ class VariantGeneratorApp:
     def _run_with_hidden_ui(self, task_func):
         self.ui_window.withdraw()
         try: return task_func()
-        finally: self.ui_window.deiconify(); self._sync_windows()
+        finally: self.ui_window.deiconify(); self._apply_window_sync(lift=True)
     
     def _open_folder(self):
         path = self.folder_path_var.get()
@@ -305,7 +471,9 @@ class VariantGeneratorApp:
     
     def _on_reload(self):
         self._populate_scenario_list()
-        print("🔄 Scenario list reloaded from disk.")
+        print("🔄 Reloading scenario list from disk...")
+        print(SCENARIO_CACHE.stats_text()); print(PREVIEW_CACHE.stats_text()); print(self.prefetcher.stats_text())
+        print(self._window_sync_stats_text())
 
     def _select_background(self):
         # 1. Check if we have a saved folder from last time
@@ -335,7 +503,9 @@ class VariantGeneratorApp:
 
     def _reset_background(self):
         # 1. Clear memory and canvas
+        self.bg_request += 1   # drops a decode still running from startup
         self.raw_bg_image = None
+        self.bg_renderer = None
         self.bg_image_ref = None
         self.bg_image_id = None
         self.bg_canvas.delete("all")
@@ -359,26 +529,76 @@ class VariantGeneratorApp:
         print("Restored default dark background.")
 
     def _apply_background_image(self, path, reset_view=False):
+        self.bg_request += 1
         try:
-            img = Image.open(path)
-            self.raw_bg_image = img 
-            win_w = self.root.winfo_screenwidth(); win_h = self.root.winfo_screenheight()
-            img_ratio = img.width / img.height; screen_ratio = win_w / win_h
-            if screen_ratio > img_ratio: default_scale = win_w / img.width
-            else: default_scale = win_h / img.height
-            
-            if reset_view or "bg_scale" not in self.settings:
-                self.bg_scale = default_scale; center_x = win_w // 2; center_y = win_h // 2
-            else:
-                self.bg_scale = float(self.settings.get("bg_scale", default_scale))
-                center_x = self.settings.get("bg_x", win_w // 2); center_y = self.settings.get("bg_y", win_h // 2)
-            
-            self.bg_canvas.delete("all"); self.bg_image_id = None
-            self._render_bg_image()
-            if self.bg_image_id: self.bg_canvas.coords(self.bg_image_id, center_x, center_y)
-            print(f"Background set to: {path}")
+            from PIL import Image
+            from background_renderer import BackgroundRenderer
+            img = Image.open(path); screen = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+            self._show_background(path, BackgroundRenderer(img, screen), self._background_view(img, reset_view, screen))
         except Exception as e: print(f"Error loading background: {e}")
 
+    def _background_view(self, img, reset_view, screen):
+        """(scale, center_x, center_y): cover the screen, or the saved pan/zoom. Reads settings only, safe off the Tk thread."""
+        win_w, win_h = screen
+        img_ratio = img.width / img.height; screen_ratio = win_w / win_h
+        if screen_ratio > img_ratio: default_scale = win_w / img.width
+        else: default_scale = win_h / img.height
+        
+        if reset_view or "bg_scale" not in self.settings:
+            return default_scale, win_w // 2, win_h // 2
+        return float(self.settings.get("bg_scale", default_scale)), self.settings.get("bg_x", win_w // 2), self.settings.get("bg_y", win_h // 2)
+
+    def _show_background(self, path, renderer, view, final_img=None, final_key=None):
+        self.bg_renderer = renderer; self.raw_bg_image = renderer.image; self.bg_scale, center_x, center_y = view
+        self.bg_canvas.delete("all"); self.bg_image_id = None
+        self._render_bg_image(final_img, final_key=final_key)
+        if self.bg_image_id: self.bg_canvas.coords(self.bg_image_id, center_x, center_y)
+        print(f"Background set to: {path}")
+
+    def _load_background_async(self, path):
+        """Startup path: decode + first resize on a worker thread; the canvas fills in when it's done."""
+        self.bg_request += 1
+        screen = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        self._start_background_task(self._background_worker, self.bg_request, path, screen, self.bg_brightness)
+
+    def _background_worker(self, request, path, screen, brightness):
+        try:
+            from PIL import Image
+            from background_renderer import BackgroundRenderer, render_key
+            img = Image.open(path); img.load()
+            view = self._background_view(img, False, screen)
+            renderer = BackgroundRenderer(img, screen)
+            # brightness is the value when the decode started; the key lets the Tk thread spot a slider move since
+            frame = renderer.render(view[0], brightness)
+            self.background_events.put(("background", request, path, renderer, view, frame, render_key(view[0], brightness)))
+        except Exception as e: self.background_events.put(("background_failed", request, path, e))
+
+    # --- Background tasks (folder scan, image decode) ---
+    def _start_background_task(self, target, *args):
+        self.background_tasks += 1
+        threading.Thread(target=target, args=args, daemon=True).start()
+        if self.background_tasks == 1: self.root.after(GENERATION_POLL_MS, self._drain_background_events)
+
+    def _drain_background_events(self):
+        try:
+            while True:
+                event = self.background_events.get_nowait()
+                kind = event[0]
+                if kind == "scan_progress":
+                    if event[1] == self.scan_id: self.scan_status_var.set(LANGUAGES[self.current_lang]["status_scanning"].format(count=event[2]))
+                    continue
+                self.background_tasks -= 1
+                if kind == "scan_done": self._on_scan_done(*event[1:])
+                elif kind == "folder_listed": self._on_folder_listed(*event[1:])
+                elif kind == "scan_failed":
+                    if event[1] == self.scan_id: self.scan_status_var.set(""); print(f"Error reading scenario folder: {event[2]}")
+                elif kind == "background":
+                    if event[1] == self.bg_request: self._show_background(*event[2:])
+                elif kind == "background_failed":
+                    if event[1] == self.bg_request: print(f"Error loading background: {event[3]}")
+        except queue.Empty: pass
+        if self.background_tasks > 0: self.root.after(GENERATION_POLL_MS, self._drain_background_events)
+
     def _create_widgets(self):
         main_frame = ttk.Frame(self.ui_window, padding="15")
         main_frame.grid(row=0, column=0, sticky="nsew")
@@ -435,11 +655,10 @@ class VariantGeneratorApp:
         self.label_scenario_name = ttk.Label(self.ui_window)
 
         list_frame = ttk.Frame(self.frame1); list_frame.grid(row=2, column=1, sticky="ew", pady=(5,0))
-        self.scenario_listbox = tk.Listbox(list_frame, height=6, exportselection=False, selectmode="extended", bg=ENTRY_BG, fg=LIGHT_TEXT, selectbackground=ACCENT_COLOR, selectforeground="black", borderwidth=0, highlightthickness=1, relief="flat", font=("Consolas", 9))
+        self.scenario_listbox = VirtualListbox(list_frame, height=6, on_select=self._on_listbox_select, bg=ENTRY_BG, fg=LIGHT_TEXT, selectbackground=ACCENT_COLOR, selectforeground="black", borderwidth=0, highlightthickness=1, relief="flat", font=("Consolas", 9))
         self.scenario_listbox.pack(side="left", fill="both", expand=True)
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.scenario_listbox.yview)
-        scrollbar.pack(side="right", fill="y"); self.scenario_listbox.config(yscrollcommand=scrollbar.set)
-        self.scenario_listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.scan_status_var = tk.StringVar()
+        ttk.Label(self.frame1, textvariable=self.scan_status_var, font=("Consolas", 9)).grid(row=3, column=1, sticky="w")
         
         # --- Frame Profiles ---
         self.frame_profiles = ttk.LabelFrame(self.ui_window, padding="10", text="💾 Settings Profile")
@@ -523,8 +742,11 @@ class VariantGeneratorApp:
         
         # --- GENERATE & LOG ---
         generate_frame = ttk.Frame(self.ui_window); generate_frame.grid(row=4, column=0, sticky="ew", pady=10, padx=15)
-        self.generate_button = ttk.Button(generate_frame, command=self._on_generate, state="disabled", style="CTA.TButton", width=30)
-        self.generate_button.pack(anchor="center", pady=5)
+        generate_buttons = ttk.Frame(generate_frame); generate_buttons.pack(anchor="center", pady=5)
+        self.generate_button = ttk.Button(generate_buttons, command=self._on_generate, state="disabled", style="CTA.TButton", width=30)
+        self.generate_button.pack(side="left")
+        self.cancel_button = ttk.Button(generate_buttons, command=self._on_cancel_generation, state="disabled", width=10)
+        self.cancel_button.pack(side="left", padx=(10, 0))
         self.progress_bar = ttk.Progressbar(generate_frame, orient='horizontal', length=500, mode='determinate')
         self.progress_bar.pack(fill="x", expand=True, pady=5, padx=(20,20))
         
@@ -557,20 +779,22 @@ class VariantGeneratorApp:
             self._add_to_batch(selected_name); self.scenario_listbox.selection_clear(0, tk.END)
         else:
             if self._after_id: self.root.after_cancel(self._after_id); self._after_id = None
-            self.scenario_name_var.set(selected_name); self._on_load()
+            # Picking a row fills the entry without refiltering the list being browsed
+            self._selecting_from_list = True
+            try: self.scenario_name_var.set(selected_name)
+            finally: self._selecting_from_list = False
+            self._on_load(); self._prefetch_around_selection()
 
     def _add_to_batch(self, scenario_name):
         if scenario_name in self.batch_queue: return
         folder_path = self.folder_path_var.get(); full_path = os.path.join(folder_path, scenario_name + ".sce")
-        data = parse_scenario_file(full_path)
-        if not data: print(f"Error loading {scenario_name}"); return
-        player_name = data.get("player_profile_name")
-        bots = data.get("derived_bot_profiles", [])
-        if not bots:
-            player_name = data.get("player_profile_name")
-            bots = [name for name in data.get("character_profiles", {}).keys() if name != player_name]
-        
-        bots = [b for b in bots if b in data.get("character_profiles", {})]
+        # The index already knows the target bots once its metadata pass has reached this file
+        record = SCENARIO_INDEX.get(folder_path, scenario_name)
+        if record: bots = record["bot_profiles"]
+        else:
+            data = load_preview(full_path)
+            if not data: print(f"Error loading {scenario_name}"); return
+            bots = get_target_bots(data)
         if not bots: print(f"No editable bots found in {scenario_name}"); return
         
         self.batch_queue[scenario_name] = {}
@@ -625,23 +849,91 @@ class VariantGeneratorApp:
             self._update_ui_text()
     
     def _populate_scenario_list(self):
-        self.all_scenarios = []; folder = self.folder_path_var.get()
-        if not os.path.isdir(folder): return
+        self.prefetcher.cancel()
+        self.scenario_search = ScenarioSearch(); folder = self.folder_path_var.get()
+        self.scanned_folder = None; self.scan_id += 1
+        if not os.path.isdir(folder): self.scan_status_var.set(""); self._update_filtered_list(); return
+        # The index refresh is a directory scan and the search index is built next to it; metadata is filled
+        # on the same thread once the list is shown
+        self.scan_status_var.set(LANGUAGES[self.current_lang]["status_scanning"].format(count=0))
+        self._start_background_task(self._scan_worker, self.scan_id, folder)
+
+    def _scan_worker(self, scan_id, folder):
         try:
-            for filename in os.listdir(folder):
-                if filename.lower().endswith(".sce"): self.all_scenarios.append(filename[:-4])
-            self.all_scenarios.sort(key=str.lower); self._update_filtered_list()
-        except Exception as e: print(f"Error reading scenario folder: {e}")
+            names, stats = SCENARIO_INDEX.scan(folder, on_progress=lambda count: self.background_events.put(("scan_progress", scan_id, count)))
+            # The trigram index takes most of a second for a 30k folder: build it here, not on the Tk thread
+            search = ScenarioSearch(names)
+            self.background_events.put(("scan_done", scan_id, folder, search, stats, os.stat(folder).st_mtime_ns))
+        except Exception as e: self.background_events.put(("scan_failed", scan_id, e)); return
+        try: SCENARIO_INDEX.fill_metadata(folder, should_stop=lambda: scan_id != self.scan_id)
+        except Exception as e: print(f"Scenario index metadata pass failed: {e}")
+
+    def _on_scan_done(self, scan_id, folder, search, stats, mtime_ns):
+        if scan_id != self.scan_id: return   # a newer scan (reload / folder change) replaced this one
+        self.scan_status_var.set("")
+        if stats and (stats.added or stats.updated or stats.removed): print(f"Scenario index: {stats}")
+        self.scenario_search = search
+        self.scanned_folder = folder; self.folder_mtime_ns = mtime_ns
+        self._update_filtered_list()
+
+    def _update_filtered_list(self, *args, keep_view=False, fuzzy=True):
+        # Ranked substring / multi-token / fuzzy matches from the search index; the list only draws visible rows
+        self.scenario_listbox.set_items(self.scenario_search.search(self.scenario_name_var.get(), fuzzy=fuzzy), keep_view=keep_view)
+
+    def _insert_scenarios(self, names):
+        """Adds new names to the sorted search model and refreshes the visible rows in place."""
+        added = sum(1 for name in names if self.scenario_search.add(name) is not None)
+        if added: self._update_filtered_list(keep_view=True)
+        return added
 
-    def _update_filtered_list(self, *args):
-        search_term = self.scenario_name_var.get().lower(); self.scenario_listbox.delete(0, tk.END)
-        for name in self.all_scenarios:
-            if not search_term or search_term in name.lower(): self.scenario_listbox.insert(tk.END, name)
+    def _remove_scenarios(self, names):
+        removed = sum(1 for name in names if self.scenario_search.remove(name) is not None)
+        if removed: self._update_filtered_list(keep_view=True)
+        return removed
+
+    def _poll_folder(self):
+        # Cheap check: only list the folder (off the Tk thread) when the directory's mtime moved.
+        # Not during a generation run: its writes move the mtime constantly and are inserted when it finishes.
+        folder = self.scanned_folder
+        try:
+            if folder and folder == self.folder_path_var.get() and self.generation_queue is None and not self.folder_listing:
+                mtime_ns = os.stat(folder).st_mtime_ns
+                if mtime_ns != self.folder_mtime_ns:
+                    self.folder_mtime_ns = mtime_ns; self.folder_listing = True
+                    self._start_background_task(self._folder_list_worker, self.scan_id, folder)
+        except OSError: pass
+        self.root.after(FOLDER_POLL_MS, self._poll_folder)
+
+    def _folder_list_worker(self, scan_id, folder):
+        try: on_disk = {entry.name[:-4] for entry in os.scandir(folder) if entry.name.lower().endswith(".sce")}
+        except OSError: on_disk = None
+        self.background_events.put(("folder_listed", scan_id, on_disk))
+
+    def _on_folder_listed(self, scan_id, on_disk):
+        self.folder_listing = False
+        if scan_id != self.scan_id or on_disk is None: return   # folder changed or reloaded meanwhile
+        added = self._insert_scenarios(on_disk - self.scenario_search.name_set)
+        removed = self._remove_scenarios(self.scenario_search.name_set - on_disk)
+        if added or removed: print(f"🔄 Folder changed: {added} added, {removed} removed.")
 
     def _schedule_load_from_entry(self, *args):
-        self._update_filtered_list()
+        if self._selecting_from_list: return
+        self.prefetcher.cancel()   # typing wins over reading ahead
+        self._update_filtered_list(fuzzy=False)   # typo matches are added once typing settles
         if self._after_id: self.root.after_cancel(self._after_id)
-        self._after_id = self.root.after(500, self._on_load)
+        self._after_id = self.root.after(500, self._on_entry_settled)
+
+    def _on_entry_settled(self):
+        self._after_id = None
+        self._update_filtered_list(keep_view=True)
+        self._on_load(); self._prefetch_around_selection()
+
+    def _prefetch_around_selection(self):
+        """Reads the rows around the selection and the top results into the preview cache in the background."""
+        if self.is_batch_mode: return
+        folder = self.folder_path_var.get()
+        names = neighbour_order(self.scenario_listbox.items, self.scenario_listbox.selected)
+        self.prefetcher.request([os.path.join(folder, name + ".sce") for name in names])
 
     def _on_browse(self):
         def task(): return filedialog.askdirectory(parent=self.root)
@@ -685,11 +977,15 @@ class VariantGeneratorApp:
         header_var = tk.StringVar(value=self.variant_configs[vtype_key]['tag_text'])
         header_label = ttk.Label(frame, text=f"{display_name} Variants")
         header_entry = ttk.Entry(frame, textvariable=header_var, width=12)
-        header_label.pack(pady=(0, 10))
+        header_label.pack(pady=(0, 5))
         btn_frame = ttk.Frame(frame); btn_frame.pack(pady=5)
         ttk.Button(btn_frame, command=lambda v=vtype_key: self._select_all(v, True)).pack(side='left', padx=2)
         ttk.Button(btn_frame, command=lambda v=vtype_key: self._select_all(v, False)).pack(side='left', padx=2)
-        widgets = {'labels': [], 'entries': [], 'header_label': header_label, 'header_entry': header_entry, 'header_var': header_var, 'btn_frame': btn_frame}
+        # Combined modifiers are generated as one file per combination of their checked values
+        self.composite_vars[vtype_key] = tk.BooleanVar(value=False)
+        combine_check = ttk.Checkbutton(frame, variable=self.composite_vars[vtype_key], style="Switch.TCheckbutton"); combine_check.pack(pady=(0, 5))
+        self.composite_vars[vtype_key].trace_add("write", self._on_settings_change)
+        widgets = {'labels': [], 'entries': [], 'header_label': header_label, 'header_entry': header_entry, 'header_var': header_var, 'btn_frame': btn_frame, 'combine_check': combine_check}
         for i, val in enumerate(values):
             row_frame = ttk.Frame(frame); row_frame.pack(anchor="w", pady=1)
             key = f"{vtype_key}_{i}"
@@ -711,14 +1007,14 @@ class VariantGeneratorApp:
         profile_data = self.settings["profiles"][profile_name]
         self.variant_configs = {}
         for key, config in MODIFIER_CONFIG.items():
-            self.variant_configs[key] = {"values": profile_data.get(config['value_key'], get_default_profile()[config['value_key']]), "suffix": config['suffix'], "tag_text": profile_data["variant_tags"][key], "display_name": config['display_name'] if key == "DURATION" else profile_data["variant_tags"][key]}
+            self.variant_configs[key] = {"values": profile_data.get(config['value_key'], get_default_profile(folder_path="")[config['value_key']]), "suffix": config['suffix'], "tag_text": profile_data["variant_tags"][key], "display_name": config['display_name'] if key == "DURATION" else profile_data["variant_tags"][key]}
         self.folder_path_var.set(profile_data["folder_path"])
+        self.is_edit_mode = False
         self._build_variant_columns()
         for key, value in profile_data["checkboxes"].items():
             if key in self.checkbox_vars: self.checkbox_vars[key].set(value)
+        for key, var in self.composite_vars.items(): var.set(key in profile_data.get("composite_modifiers", []))
         self._update_profile_dropdown()
-        self.is_edit_mode = False
-        self._toggle_edit_mode(); self._toggle_edit_mode()
         self.ui_ready = True
     def _update_profile_dropdown(self): self.profile_combobox['values'] = list(self.settings["profiles"].keys()); self.profile_combobox.set(self.active_profile_name)
     def _on_profile_select(self, event=None):
@@ -758,32 +1054,25 @@ class VariantGeneratorApp:
             self._load_profile(new_active_profile); print(f"Profile '{profile_to_delete}' deleted.")
     
     def _on_load(self):
+        # Preview only: name, globals and target stats come from a header parse; generation loads the full file
         if self.is_batch_mode: return
-        
-        for widget in self.bot_scroll_area.scrollable_frame.winfo_children(): widget.destroy()
-        
-        self.bot_selection_vars = {}
         user_typed_name = self.scenario_name_var.get().strip(); folder_path = self.folder_path_var.get()
-        if not folder_path or not user_typed_name: self.stat_vars["Scenario Name:"].set(LANGUAGES[self.current_lang]['stats_scenario_name']); return
+        if not folder_path or not user_typed_name: self._show_bot_checkboxes([]); self.stat_vars["Scenario Name:"].set(LANGUAGES[self.current_lang]['stats_scenario_name']); return
         full_path = os.path.join(folder_path, user_typed_name + ".sce")
         if not os.path.exists(full_path):
+            self._show_bot_checkboxes([])
             self.generate_button.config(state="disabled"); self.stat_vars["Scenario Name:"].set(LANGUAGES[self.current_lang]['stats_scenario_name'])
             for key, var in self.stat_vars.items():
                 if key != "Scenario Name:": var.set("N/A")
             return
         print(f"Attempting to load: {full_path}")
-        self.loaded_scenario_data = parse_scenario_file(full_path)
+        self.loaded_scenario_data = load_preview(full_path)
         if self.loaded_scenario_data:
             self.loaded_scenario_data["user_provided_name"] = user_typed_name; self.stat_vars["Scenario Name:"].set(f"{LANGUAGES[self.current_lang]['label_scenario_name']} {user_typed_name}")
             self.stat_vars["Timescale:"].set(self.loaded_scenario_data.get('global_properties', {}).get('Timescale', 'N/A'))
             duration = self.loaded_scenario_data.get('global_properties', {}).get('Timelimit', 'N/A'); self.stat_vars["Duration:"].set(f"{duration:.1f}s" if isinstance(duration, (int, float)) else "N/A")
-            player_name = self.loaded_scenario_data.get("player_profile_name"); all_profiles = self.loaded_scenario_data.get("character_profiles", {})
-            target_names = self.loaded_scenario_data.get("derived_bot_profiles", [])
-            if not target_names:
-                target_names = [name for name in all_profiles.keys() if name != player_name]
-            
-            target_names = [name for name in target_names if name in all_profiles]
-            target_names.sort()
+            all_profiles = self.loaded_scenario_data.get("character_profiles", {})
+            target_names = sorted(get_target_bots(self.loaded_scenario_data))
             
             if target_names:
                 
@@ -802,25 +1091,37 @@ class VariantGeneratorApp:
                 self.stat_vars["Target Max Speed:"].set(first_target_profile.get("MaxSpeed", "N/A")); self.stat_vars["Target HP:"].set(first_target_profile.get("MaxHealth", "N/A")); self.stat_vars["Target Regen/s:"].set(first_target_profile.get("HealthRegenPerSec", "N/A"))
                 
                 self.bot_selection_frame.config(text=LANGUAGES[self.current_lang]["frame_targets_modify"])
-                
-                inner_frame = self.bot_scroll_area.scrollable_frame
-                
-                btn_frame = ttk.Frame(inner_frame); btn_frame.pack(anchor='w', pady=(0,5))
-                self.bot_select_all_btn = ttk.Button(btn_frame, text=LANGUAGES[self.current_lang]["button_select_all"], command=lambda: self._select_all_bots(True))
-                self.bot_select_all_btn.pack(side='left', padx=2)
-                
-                checkbox_container = ttk.Frame(inner_frame); checkbox_container.pack(fill='x')
-                for i, bot_name in enumerate(target_names):
-                    var = tk.BooleanVar(value=True); self.bot_selection_vars[bot_name] = var
-                    cb = tk.Checkbutton(checkbox_container, text=bot_name, variable=var, bg=ENTRY_BG, fg=LIGHT_TEXT, selectcolor=ENTRY_BG, activebackground=ENTRY_BG, activeforeground=ACCENT_COLOR, borderwidth=0, highlightthickness=0, padx=5, pady=2)
-                    cb.grid(row=i // 4, column=i % 4, sticky='w', padx=5, pady=2); self._style_checkbox_dynamic(cb, var)
+                self._show_bot_checkboxes(target_names)
             else:
+                self._show_bot_checkboxes([])
                 for key in self.stat_vars:
                     if key not in ["Scenario Name:", "Timescale:", "Duration:"]: self.stat_vars[key].set("N/A")
             self.generate_button.config(state="normal"); print("✅ Success! Scenario file loaded.")
-        else: messagebox.showerror("Error", f"Found '{user_typed_name}.sce' but could not read or parse it."); self.generate_button.config(state="disabled")
+        else: self._show_bot_checkboxes([]); messagebox.showerror("Error", f"Found '{user_typed_name}.sce' but could not read or parse it."); self.generate_button.config(state="disabled")
+
+    def _show_bot_checkboxes(self, target_names):
+        """Target bot grid. Scenarios with the same targets (most of a pack) only reset the boxes instead of rebuilding them."""
+        target_names = tuple(target_names)
+        if target_names == self.bot_grid_names:
+            for var in self.bot_selection_vars.values(): var.set(True)
+            return
+        for widget in self.bot_scroll_area.scrollable_frame.winfo_children(): widget.destroy()
+        self.bot_selection_vars = {}; self.bot_grid_names = target_names
+        if not target_names: return
+        inner_frame = self.bot_scroll_area.scrollable_frame
+        
+        btn_frame = ttk.Frame(inner_frame); btn_frame.pack(anchor='w', pady=(0,5))
+        self.bot_select_all_btn = ttk.Button(btn_frame, text=LANGUAGES[self.current_lang]["button_select_all"], command=lambda: self._select_all_bots(True))
+        self.bot_select_all_btn.pack(side='left', padx=2)
+        
+        checkbox_container = ttk.Frame(inner_frame); checkbox_container.pack(fill='x')
+        for i, bot_name in enumerate(target_names):
+            var = tk.BooleanVar(value=True); self.bot_selection_vars[bot_name] = var
+            cb = tk.Checkbutton(checkbox_container, text=bot_name, variable=var, bg=ENTRY_BG, fg=LIGHT_TEXT, selectcolor=ENTRY_BG, activebackground=ENTRY_BG, activeforeground=ACCENT_COLOR, borderwidth=0, highlightthickness=0, padx=5, pady=2)
+            cb.grid(row=i // 4, column=i % 4, sticky='w', padx=5, pady=2); self._style_checkbox_dynamic(cb, var)
 
     def _on_generate(self):
+        if self.generation_queue is not None: return  # A run is already in progress
         if self.is_batch_mode:
             scenarios_to_process = list(self.batch_queue.keys())
             if not scenarios_to_process: messagebox.showerror("Error", "Batch queue is empty!"); return
@@ -828,53 +1129,102 @@ class VariantGeneratorApp:
             if not self.loaded_scenario_data: messagebox.showerror("Error", "No scenario loaded."); return
             scenarios_to_process = [self.scenario_name_var.get()]
         self._on_settings_change()
-        tasks = []
-        for vtype_key, config in self.variant_configs.items():
-            for i, value in enumerate(config['values']):
-                if self.checkbox_vars[f"{vtype_key}_{i}"].get(): tasks.append((vtype_key, value))
+        checked = {vtype_key: [value for i, value in enumerate(config['values']) if self.checkbox_vars[f"{vtype_key}_{i}"].get()] for vtype_key, config in self.variant_configs.items()}
+        tasks = build_tasks(checked, [key for key, var in self.composite_vars.items() if var.get()])
         if not tasks: print("--- No variants were selected. ---"); return
 
-        print(f"\n--- Starting Generation of {len(tasks) * len(scenarios_to_process)} files ---")
+        combinations = count_combinations(tasks)
+        print(f"\n--- Starting Generation of {len(tasks) * len(scenarios_to_process)} files" + (f" ({combinations} combinations per scenario)" if combinations else "") + " ---")
         self.generate_button.config(state="disabled") # Disable during processing
+        self.cancel_button.config(state="normal")
         self.progress_bar['maximum'] = len(tasks) * len(scenarios_to_process); self.progress_bar['value'] = 0
-        self.ui_window.update() # Force UI update
         
-        created_count = 0; overwrite_decision = 'ask'; folder_path = self.folder_path_var.get()
+        folder_path = self.folder_path_var.get()
+        if self.is_batch_mode:
+            jobs = [ScenarioJob(s_name, [b for b, v in self.batch_queue.get(s_name, {}).items() if v.get()]) for s_name in scenarios_to_process]
+            workers = self.settings.get("generation_workers", 0)
+        else:
+            jobs = [ScenarioJob(scenarios_to_process[0], [bot_name for bot_name, var in self.bot_selection_vars.items() if var.get()])]
+            workers = 1
         
-        for s_index, s_name in enumerate(scenarios_to_process):
-            print(f"Processing: {s_name}...")
-            full_path = os.path.join(folder_path, s_name + ".sce"); scenario_data = parse_scenario_file(full_path)
-            if not scenario_data: print(f"❌ Could not load {s_name}, skipping."); continue
-            scenario_data["user_provided_name"] = s_name
-            
-            if self.is_batch_mode:
-                file_bots = self.batch_queue.get(s_name, {}); selected_bots = [b for b, v in file_bots.items() if v.get()]
-            else:
-                selected_bots = [bot_name for bot_name, var in self.bot_selection_vars.items() if var.get()]
-            
-            if not selected_bots and any(MODIFIER_CONFIG[t[0].upper()]['scope'] == 'Character Profile' for t in tasks):
-                 print(f"   ⚠ No targets selected for {s_name}. Skipping character variants.")
-
-            for t_index, (vtype, val) in enumerate(tasks):
-                should_create = True
-                new_scenario_name = calculate_target_filename(s_name, vtype, val, self.variant_configs)
-                new_filename = new_scenario_name + ".sce"
-                if overwrite_decision != 'yes_all':
-                    if os.path.exists(os.path.join(folder_path, new_filename)):
-                        if overwrite_decision == 'ask': 
-                            dialog = OverwriteDialog(self.ui_window, new_filename, self.current_lang); overwrite_decision = dialog.result
-                        if overwrite_decision == 'no_all': print("⏩ Skipping remaining overwrites."); break
-                        if overwrite_decision == 'no': print(f"⏩ Skipped: {new_filename}"); should_create = False
-                if should_create:
-                    result = create_variant_file(scenario_data, folder_path, vtype, val, self.variant_configs, selected_bots)
-                    if result == "success": created_count += 1
-                current_step = (s_index * len(tasks)) + t_index + 1
-                self.progress_bar['value'] = current_step; self.ui_window.update_idletasks()
-        
-        print(f"--- Finished! Created {created_count} new files. ---")
-        self._populate_scenario_list(); self.progress_bar['value'] = 0
+        # Generation runs on a worker thread; everything it reports comes back through this queue
+        self.generation_queue = queue.Queue(); self.cancel_event = threading.Event()
+        self.generation_stats = {"created": 0, "processed": 0, "created_names": [], "write_stats": WriteStats(), "started": time.perf_counter()}
+        TIMINGS.enable(self.settings.get("timing_report", False)); TIMINGS.reset()
+        args = (folder_path, jobs, tasks, naming_configs(self.variant_configs), workers, self.cancel_event, self.generation_queue, self.settings.get("write_durability", "none"))
+        threading.Thread(target=self._generation_worker, args=args, daemon=True).start()
+        self.root.after(GENERATION_POLL_MS, self._drain_generation_queue)
+
+    def _generation_worker(self, folder_path, jobs, tasks, variant_configs, workers, cancel_event, events, durability):
+        # Worker thread: must not touch Tk, only post to the queue
+        try:
+            # Plan first: one folder snapshot, one overwrite decision for the whole run
+            plan = plan_generation(folder_path, jobs, tasks, variant_configs, cancel_event=cancel_event)
+            if cancel_event.is_set(): events.put(("done", None)); return
+            events.put(("plan", plan))
+            if plan.count("overwrite"):
+                decision = self._ask_plan_from_worker(plan)
+                if decision == "cancel":
+                    cancel_event.set(); events.put(("done", None)); return
+                plan.apply_overwrite_policy(decision == "overwrite")
+            manifest = open_manifest(self.settings, folder_path, source="gui", profile=self.active_profile_name, workers=workers, durability=durability)
+            try:
+                for job_result in run_generation(folder_path, jobs, tasks, variant_configs, workers=workers, cancel_event=cancel_event, on_progress=lambda n: events.put(("progress", n)), durability=durability):
+                    if manifest: manifest.add_job(job_result)
+                    events.put(("job", job_result))
+            finally:
+                if manifest: manifest.close(cancelled=cancel_event.is_set()); print(f"Run manifest: {manifest.path}")
+        except Exception as e: events.put(("error", e))
+        events.put(("done", None))
+
+    def _ask_plan_from_worker(self, plan):
+        # Called on the worker thread; the dialog itself is shown by the UI thread
+        reply = queue.Queue(maxsize=1)
+        self.generation_queue.put(("ask_plan", (plan, reply)))
+        return reply.get()
+
+    def _on_cancel_generation(self):
+        if self.cancel_event and not self.cancel_event.is_set():
+            self.cancel_event.set(); self.cancel_button.config(state="disabled")
+            print("⏹ Cancelling after the current file...")
+
+    def _drain_generation_queue(self):
+        finished = False
+        while True:
+            try: kind, payload = self.generation_queue.get_nowait()
+            except queue.Empty: break
+            if kind == "progress": self.generation_stats["processed"] += payload
+            elif kind == "job":
+                if payload.log:
+                    with span("gui.log"): print(payload.log, end="")
+                created_names = [r.target_name for r in payload.results if r.result == "success"]
+                self.generation_stats["created"] += len(created_names); self.generation_stats["created_names"].extend(created_names)
+                if payload.write_stats: self.generation_stats["write_stats"].merge(payload.write_stats)
+            elif kind == "plan": print(f"--- Plan: {payload.summary()} ---")
+            elif kind == "ask_plan":
+                plan, reply = payload
+                # Cancel pressed while the plan was being built: don't ask about a run that won't happen
+                reply.put("cancel" if self.cancel_event.is_set() else GenerationPlanDialog(self.ui_window, plan, self.current_lang).result)
+            elif kind == "error": print(f"❌ ERROR during generation: {payload}")
+            elif kind == "done": finished = True
+        with span("gui.progress"): self.progress_bar['value'] = self.generation_stats["processed"]
+        if finished: self._on_generation_finished()
+        else: self.root.after(GENERATION_POLL_MS, self._drain_generation_queue)
+
+    def _on_generation_finished(self):
+        created_count = self.generation_stats["created"]
+        if self.cancel_event.is_set(): print(f"--- Cancelled! Created {created_count} new files. ---")
+        else: print(f"--- Finished! Created {created_count} new files. ---")
+        self.generation_queue = None
+        print(self.generation_stats["write_stats"]); print(SCENARIO_CACHE.stats_text())
+        if TIMINGS.enabled: self._print_timing_report()
+        self._insert_scenarios(self.generation_stats["created_names"]); self.progress_bar['value'] = 0
+        if self.scanned_folder and self.generation_stats["created_names"]:
+            threading.Thread(target=SCENARIO_INDEX.add_files, args=(self.scanned_folder, list(self.generation_stats["created_names"])), daemon=True).start()
+        if self.scanned_folder and os.path.isdir(self.scanned_folder): self.folder_mtime_ns = os.stat(self.scanned_folder).st_mtime_ns
         
         self.generate_button.config(state="normal") # Re-enable
+        self.cancel_button.config(state="disabled")
         
         # --- FIX: Stronger Focus Force ---
         if hasattr(self, 'search_entry'):
@@ -885,6 +1235,15 @@ class VariantGeneratorApp:
             
             self.root.after(100, restore_focus)
 
+    def _print_timing_report(self):
+        files, elapsed = self.generation_stats["processed"], time.perf_counter() - self.generation_stats["started"]
+        print(TIMINGS.report(files, elapsed))
+        export_path = self.settings.get("timing_export")
+        if export_path:
+            try: TIMINGS.export_json(export_path, files, elapsed); print(f"Timing report written to {export_path}")
+            except OSError as e: print(f"❌ Could not write timing report: {e}")
+        TIMINGS.enable(False)
+
     def _toggle_edit_mode(self):
         self.is_edit_mode = not self.is_edit_mode
         lang = LANGUAGES[self.current_lang]
@@ -917,6 +1276,7 @@ class VariantGeneratorApp:
         active_profile = self.settings["profiles"][self.active_profile_name]
         active_profile["folder_path"] = self.folder_path_var.get()
         active_profile["checkboxes"] = {key: var.get() for key, var in self.checkbox_vars.items()}
+        active_profile["composite_modifiers"] = [key for key, var in self.composite_vars.items() if var.get()]
         try:
             for key, config in self.variant_configs.items():
                 if 'widgets' not in config: continue
@@ -930,6 +1290,7 @@ class VariantGeneratorApp:
                 config["tag_text"] = current_tag
         except (ValueError, tk.TclError): pass
     def _on_closing(self):
+        if self.cancel_event: self.cancel_event.set()
         if self.ui_ready:
             self._on_settings_change()
             if self.bg_image_id:
@@ -938,4 +1299,5 @@ class VariantGeneratorApp:
                     self.settings["bg_x"] = coords[0]; self.settings["bg_y"] = coords[1]
                     self.settings["bg_scale"] = self.bg_scale; self.settings["bg_brightness"] = self.bg_brightness
             save_settings(self.settings)
+        SCENARIO_INDEX.close()
         self.root.destroy()
\ No newline at end of file
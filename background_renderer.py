@@ -0,0 +1,46 @@
+# background_renderer.py
+# Resize + brightness pipeline for the window background. Interactive frames (zoom ticks, slider
+# moves) are resampled from a screen-sized working copy with a fast filter; the LANCZOS frame is
+# rendered once input settles and kept in a small cache keyed by (scale, brightness).
+from collections import OrderedDict
+
+from PIL import Image, ImageEnhance
+
+WORKING_COPY_FACTOR = 2.0   # working copy covers this many screens, i.e. zooming in 2x past "cover"
+RENDER_CACHE_SIZE = 6       # finished frames kept for revisits (slider dragged back, zoom undone)
+
+def render_key(scale, brightness): return (round(scale, 4), round(brightness, 3))
+
+class BackgroundRenderer:
+    """
+    One background image and its working copy. Pure PIL, so it can be built and used off the Tk thread.
+
+        renderer = BackgroundRenderer(image, (screen_w, screen_h))
+        frame = renderer.render(scale, brightness, fast=True)   # while dragging
+        frame = renderer.render(scale, brightness)              # once idle
+    """
+    def __init__(self, image, screen_size):
+        self.image = image
+        ratio = min(1.0, screen_size[0] * WORKING_COPY_FACTOR / image.width, screen_size[1] * WORKING_COPY_FACTOR / image.height)
+        if ratio < 1.0: self.working = image.resize((max(1, int(image.width * ratio)), max(1, int(image.height * ratio))), Image.Resampling.LANCZOS)
+        else: self.working = image
+        self.cache = OrderedDict()   # render_key -> finished frame
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, scale, brightness, fast=False):
+        """The image at scale (relative to the original) and brightness. fast frames use BILINEAR and aren't cached."""
+        key = render_key(scale, brightness)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key); self.hits += 1
+            return cached
+        size = (max(1, int(self.image.width * scale)), max(1, int(self.image.height * scale)))
+        # The working copy is enough unless zoomed in past it
+        source = self.working if size[0] <= self.working.width and size[1] <= self.working.height else self.image
+        frame = ImageEnhance.Brightness(source.resize(size, Image.Resampling.BILINEAR if fast else Image.Resampling.LANCZOS)).enhance(brightness)
+        if not fast:
+            self.misses += 1
+            self.cache[key] = frame
+            while len(self.cache) > RENDER_CACHE_SIZE: self.cache.popitem(last=False)
+        return frame
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# python -m benchmarks.corpus / python -m benchmarks.run, from the project folder
@@ -0,0 +1,80 @@
+# benchmarks/corpus.py
+# Synthetic KovaaK's .sce files shaped like real ones: a header block, one [Character Profile]
+# per character and a [Bot Profile] per bot, padded with the unrelated keys real files carry.
+#   python -m benchmarks.corpus OUT_FOLDER --count 500
+import os
+import random
+import argparse
+
+KINDS = ("normal", "score_gauntlet", "degen_gauntlet", "timescaled")   # score = Type 1, degen = Type 2
+DEFAULT_MIX = {"normal": 0.7, "score_gauntlet": 0.1, "degen_gauntlet": 0.1, "timescaled": 0.1}
+WORDS = ["1w4ts", "Reload", "Small", "Pasu", "Voltaic", "Tile", "Frenzy", "Air", "Angelic", "Smooth", "Track", "Pokeball",
+         "Ground", "Plaza", "Wide", "Wall", "Strafe", "Thin", "Long", "Static", "Dynamic", "Popcorn", "Sphere", "Close"]
+
+# Keys the app never touches; real files have a few hundred lines of these
+HEADER_FILLER = ["GameModeName=", "Description=", "Author=", "AuthorSteamID=0", "PlayerProfileSet=", "TimerOverride=false",
+                 "PauseOnPlayerDeath=false", "LockFOVRange=false", "MinFOV=90.0", "MaxFOV=90.0", "PlayerRespawnDelay=1.0",
+                 "BotRespawnDelay=0.0", "HideTimer=false", "ScoreMultiplier=1.0", "MapName=", "MapScale=3.8",
+                 "WeaponProfileName=Default", "EndOnTimerExpired=true", "DamageMultiplier=1.0"]
+PROFILE_FILLER = ["MaxHealthAboveMaxEnabled=false", "Gravity=750.0", "AirAcceleration=16000.0", "Acceleration=16000.0",
+                  "CrouchHeightModifier=0.75", "JumpVelocity=160.0", "AirControl=0.25", "CanCrouch=true", "CanJump=true",
+                  "BlockHeadshots=false", "DamageKnockbackFactor=8.0", "InheritOwnerSize=false", "EnemyBodyColor=X=255.000 Y=0.000 Z=0.000",
+                  "EnemyHeadColor=X=255.000 Y=255.000 Z=255.000", "TeamBodyColor=X=0.000 Y=0.000 Z=255.000", "SpawnInvulnerabilityTime=0.0"]
+WEAPON_SECTION = ["[Weapon Profile]", "Name=Default", "Type=Hitscan", "ShotsPerClick=1", "DamagePerShot=100.0", "MaxHealth=0.0", "Pierce=false"]
+
+def scenario_lines(rng, name, bots=1, kind="normal", filler=1):
+    """One .sce as a list of lines (with newlines). filler repeats the unrelated keys to grow the file."""
+    timescale = rng.choice([0.5, 0.7, 1.25]) if kind == "timescaled" else 1.0
+    timelimit = rng.choice([30.0, 60.0, 90.0]) * timescale
+    bot_names = [f"{name.split()[0]}Bot{i}" for i in range(bots)]
+    profile_names = [f"Target{i}" for i in range(max(1, bots // 2 + bots % 2))]   # several bots can share a profile
+
+    header = [f"Name={name}", "PlayerCharacters=Player.rabot", f"BotCharacters={';'.join(b + '.bot' for b in bot_names)}",
+              f"Timelimit={timelimit}", f"Timescale={timescale}",
+              f"ScorePerTime={rng.choice([1.0, 5.0]) if kind == 'score_gauntlet' else 0.0}",
+              f"ScorePerHit={rng.choice([0.0, 1.0])}", f"ScorePerDamage={rng.choice([0.0, 0.01])}", f"ScorePerKill={rng.choice([0.0, 100.0])}"]
+    header += HEADER_FILLER * filler
+
+    sections = ["[Character Profile]", "Name=Player", "MainBBRadius=29.0", "MainBBHeadRadius=12.0", "MaxSpeed=800.0",
+                "MaxCrouchSpeed=400.0", "MaxHealth=100.0", "HealthRegenPerSec=0.0"] + PROFILE_FILLER * filler
+    for profile in profile_names:
+        max_health = rng.choice([100.0, 200.0, 1000.0, 10000.0])
+        regen = -rng.choice([5.0, 20.0, 100.0]) if kind == "degen_gauntlet" else rng.choice([0.0, 0.0, 10.0])
+        sections += ["[Character Profile]", f"Name={profile}", f"MainBBRadius={rng.uniform(10, 60):.1f}",
+                     f"MainBBHeadRadius={rng.uniform(5, 25):.1f}", f"MaxSpeed={rng.choice([0.0, 300.0, 600.0, 1200.0])}",
+                     f"MaxCrouchSpeed={rng.choice([0.0, 150.0, 300.0])}", f"MaxHealth={max_health}", f"HealthRegenPerSec={regen}",
+                     f"MinRespawnDelay={rng.choice([0.0, 0.5])}", f"MaxRespawnDelay={rng.choice([0.0, 1.0])}"] + PROFILE_FILLER * filler
+    for i, bot in enumerate(bot_names):
+        sections += ["[Bot Profile]", f"Name={bot}", f"CharacterProfile={profile_names[i % len(profile_names)]}", "SeeThroughWalls=false"]
+    return [line + "\n" for line in header + sections + WEAPON_SECTION]
+
+def scenario_name(rng, index):
+    return f"{' '.join(rng.sample(WORDS, rng.randint(2, 4)))} {index}"
+
+def write_corpus(folder, count, seed=0, bots=(1, 4), mix=None, filler=1):
+    """Writes `count` scenarios into folder and returns their names. Same seed, same files."""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = list(mix), list(mix.values())
+    os.makedirs(folder, exist_ok=True)
+    names = []
+    for i in range(count):
+        name = scenario_name(rng, i)
+        lines = scenario_lines(rng, name, bots=rng.randint(*bots), kind=rng.choices(kinds, weights)[0], filler=filler)
+        with open(os.path.join(folder, name + ".sce"), 'w', encoding='utf-8') as f: f.writelines(lines)
+        names.append(name)
+    return names
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.corpus", description="Write a synthetic .sce corpus")
+    parser.add_argument("folder")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-bots", type=int, default=4)
+    parser.add_argument("--filler", type=int, default=1, help="Repeat unrelated keys N times to grow each file")
+    args = parser.parse_args(argv)
+    names = write_corpus(args.folder, args.count, args.seed, (1, args.max_bots), filler=args.filler)
+    print(f"Wrote {len(names)} scenarios to {args.folder}")
+
+if __name__ == "__main__":
+    main()
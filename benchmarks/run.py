@@ -0,0 +1,130 @@
+# benchmarks/run.py
+# Timed benchmarks for the hot paths in scenario_logic and the generation engine.
+#   python -m benchmarks.run --scenarios 200 --variants 20 --out results.json [--compare old.json]
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+from benchmarks.corpus import write_corpus
+from scenario_logic import (parse_scenario_file, create_variant_file, calculate_target_filename, get_default_profile,
+                            get_profile_tasks, get_profile_variant_configs, get_target_bots, SCENARIO_CACHE)
+from generation_engine import ScenarioJob, plan_generation, run_generation
+
+def timed(fn, repeat):
+    """Runs fn() `repeat` times; returns (best, median) wall seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter(); fn(); times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+def result(ops, best, median):
+    return {"ops": ops, "best_s": round(best, 6), "median_s": round(median, 6), "ops_per_s": round(ops / best, 1) if best > 0 else None}
+
+def bench_parse(corpus, names, repeat):
+    paths = [os.path.join(corpus, name + ".sce") for name in names]
+    return result(len(paths), *timed(lambda: [parse_scenario_file(p) for p in paths], repeat))
+
+def bench_naming(names, tasks, configs, repeat):
+    # Distinct base names each round so memoization doesn't turn this into a dict benchmark
+    rounds = iter(range(repeat))
+    def run():
+        suffix = f" r{next(rounds)}"
+        for name in names:
+            for vtype, val in tasks: calculate_target_filename(name + suffix, vtype, val, configs)
+    return result(len(names) * len(tasks), *timed(run, repeat))
+
+def bench_create_variant(corpus, names, tasks, configs, repeat, work_dir):
+    loaded = []
+    for name in names:
+        data = parse_scenario_file(os.path.join(corpus, name + ".sce"))
+        data["user_provided_name"] = name
+        loaded.append((data, get_target_bots(data)))
+    out = os.path.join(work_dir, "create_variant")
+    def run():
+        shutil.rmtree(out, ignore_errors=True); os.makedirs(out)
+        for data, bots in loaded:
+            for vtype, val in tasks: create_variant_file(data, out, vtype, val, configs, bots, log=lambda message: None)
+    return result(len(names) * len(tasks), *timed(run, repeat))
+
+def bench_end_to_end(corpus, names, tasks, configs, repeat, workers, work_dir):
+    out = os.path.join(work_dir, "end_to_end")
+    def run():
+        shutil.rmtree(out, ignore_errors=True); shutil.copytree(corpus, out)
+        SCENARIO_CACHE.clear()
+        jobs = [ScenarioJob(name) for name in names]
+        plan_generation(out, jobs, tasks, configs).apply_overwrite_policy(True)
+        for _ in run_generation(out, jobs, tasks, configs, workers=workers): pass
+    return result(len(names) * len(tasks), *timed(run, repeat))
+
+def git_commit():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError: return None
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f: baseline = json.load(f)
+    print(f"--- vs {baseline.get('label') or baseline.get('commit')} ({baseline_path}) ---")
+    for name, current in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("ops_per_s") or not current["ops_per_s"]: continue
+        print(f"  {name:<16} {old['ops_per_s']:>12.1f} -> {current['ops_per_s']:>12.1f} ops/s  ({current['ops_per_s'] / old['ops_per_s']:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmark parsing, naming and variant generation")
+    parser.add_argument("--scenarios", type=int, default=200, help="N scenarios in the corpus")
+    parser.add_argument("--variants", type=int, default=20, help="M variants per scenario, taken from the default profile")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="Workers for the end-to-end run, 0 = one per core")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", help="Use (or create) this folder instead of a temp corpus")
+    parser.add_argument("--only", action="append", choices=["parse", "naming", "create_variant", "end_to_end"])
+    parser.add_argument("--label", help="Name stored in the results file, e.g. a branch or version")
+    parser.add_argument("--out", help="Write results as JSON")
+    parser.add_argument("--compare", metavar="JSON", help="Print speedups against an earlier results file")
+    args = parser.parse_args(argv)
+
+    profile = get_default_profile(folder_path="")   # variant defaults only; don't probe this machine's Steam libraries
+    configs = get_profile_variant_configs(profile)
+    tasks = get_profile_tasks(profile)[:args.variants]
+    work_dir = tempfile.mkdtemp(prefix="variant-bench-")
+    try:
+        corpus = args.corpus or os.path.join(work_dir, "corpus")
+        if not os.path.isdir(corpus) or not any(n.endswith(".sce") for n in os.listdir(corpus)):
+            write_corpus(corpus, args.scenarios, seed=args.seed)
+        names = sorted(n[:-4] for n in os.listdir(corpus) if n.endswith(".sce"))[:args.scenarios]
+        print(f"--- {len(names)} scenarios x {len(tasks)} variants, best of {args.repeat} ---")
+
+        selected = args.only or ["parse", "naming", "create_variant", "end_to_end"]
+        benches = {
+            "parse": lambda: bench_parse(corpus, names, args.repeat),
+            "naming": lambda: bench_naming(names, tasks, configs, args.repeat),
+            "create_variant": lambda: bench_create_variant(corpus, names, tasks, configs, args.repeat, work_dir),
+            "end_to_end": lambda: bench_end_to_end(corpus, names, tasks, configs, args.repeat, args.workers, work_dir),
+        }
+        results = {}
+        for name in selected:
+            results[name] = benches[name]()
+            r = results[name]
+            print(f"  {name:<16} {r['ops']:>8} ops  best {r['best_s'] * 1000:>9.1f} ms  median {r['median_s'] * 1000:>9.1f} ms  {r['ops_per_s']:>12.1f} ops/s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"label": args.label, "commit": git_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+              "python": sys.version.split()[0], "platform": platform.platform(), "cpu_count": os.cpu_count(),
+              "params": {"scenarios": len(names), "variants": len(tasks), "repeat": args.repeat, "workers": args.workers, "seed": args.seed},
+              "results": results}
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f: json.dump(report, f, indent=4)
+        print(f"Results written to {args.out}")
+    if args.compare: print_comparison(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
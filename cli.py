@@ -0,0 +1,144 @@
+# cli.py
+# Headless variant generation: python main.py generate ...  (or python -m cli generate ...)
+import os
+import sys
+import time
+import argparse
+import fnmatch
+from collections import Counter
+
+from scenario_logic import load_settings, get_profile_tasks, get_profile_variant_configs, count_combinations
+from generation_engine import ScenarioJob, plan_generation, run_generation
+from variant_writer import DURABILITY_MODES, WriteStats
+from timing import TIMINGS
+from manifest import open_manifest
+
+FAILED_RESULTS = ("error", "load_failed")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="iyo's Variant Generator - command line mode")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="Generate variants for every matching scenario in a folder")
+    gen.add_argument("--folder", help="Scenarios folder (default: the profile's folder_path)")
+    gen.add_argument("--match", action="append", metavar="GLOB", help="Scenario name glob, e.g. '1w4ts*'. Repeatable. Default: all")
+    gen.add_argument("--list", metavar="FILE", help="Text file with one scenario name per line")
+    gen.add_argument("--profile", help="Settings profile from settings.json (default: last active)")
+    gen.add_argument("--overwrite", choices=["ask", "yes", "no"], default="no", help="What to do with existing targets, decided once for the run (default: no)")
+    gen.add_argument("--timing", action="store_true", help="Print per-phase timings (p50/p95 per file) after the run")
+    gen.add_argument("--timing-json", metavar="FILE", help="Also write the timing summary as JSON (implies --timing)")
+    gen.add_argument("--manifest-dir", metavar="DIR", help="Folder for this run's JSONL manifest (default: settings.json)")
+    gen.add_argument("--no-manifest", action="store_true", help="Don't write a run manifest")
+    gen.add_argument("--dry-run", action="store_true", help="Print the generation plan and exit without writing")
+    gen.add_argument("--workers", type=int, help="Worker processes, 0 = one per core (default: settings.json)")
+    gen.add_argument("--durability", choices=DURABILITY_MODES, help="fsync never / per scenario / per file (default: settings.json)")
+    return parser
+
+def read_name_list(path):
+    names = []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            name = line.strip()
+            if not name or name.startswith('#'): continue
+            if name.lower().endswith(".sce"): name = name[:-4]
+            names.append(name)
+    return names
+
+def select_scenarios(folder, patterns, list_file):
+    available = sorted((entry.name[:-4] for entry in os.scandir(folder) if entry.name.lower().endswith(".sce")), key=str.lower)
+    if list_file:
+        wanted = read_name_list(list_file)
+        known = set(available)
+        for name in wanted:
+            if name not in known: print(f"missing              {name}.sce")
+        available = [name for name in wanted if name in known]
+    if patterns:
+        available = [name for name in available if any(fnmatch.fnmatch(name, p) for p in patterns)]
+    return available
+
+def ask_overwrite(count):
+    while True:
+        try: choice = input(f"{count} target(s) already exist. Overwrite them? [y]es / [n]o: ").strip().lower()
+        except EOFError:
+            # No one to ask (cron, </dev/null): keep existing files
+            print("\nNo answer on stdin; existing targets will be skipped. Use --overwrite yes/no in scripts.")
+            return False
+        if choice in ("y", "n"): return choice == "y"
+
+def run_generate(args):
+    settings = load_settings()
+    profile_name = args.profile or settings["last_active_profile"]
+    if profile_name not in settings["profiles"]:
+        print(f"Unknown profile '{profile_name}'. Available: {', '.join(settings['profiles'])}")
+        return 2
+    profile = settings["profiles"][profile_name]
+
+    folder = args.folder or profile["folder_path"]
+    if not os.path.isdir(folder):
+        print(f"Scenario folder not found: {folder}")
+        return 2
+
+    tasks = get_profile_tasks(profile)
+    if not tasks:
+        print(f"Profile '{profile_name}' has no variants selected.")
+        return 2
+    scenarios = select_scenarios(folder, args.match, args.list)
+    if not scenarios:
+        print("No matching scenarios.")
+        return 2
+
+    workers = args.workers if args.workers is not None else settings.get("generation_workers", 0)
+    durability = args.durability or settings.get("write_durability", "none")
+    variant_configs = get_profile_variant_configs(profile)
+    jobs = [ScenarioJob(name) for name in scenarios]
+    TIMINGS.enable(bool(args.timing or args.timing_json)); TIMINGS.reset()
+    combinations = count_combinations(tasks)
+    if combinations: print(f"--- {combinations} combinations per scenario ({next(vtype for vtype, value in tasks if isinstance(value, tuple))}) ---")
+    plan = plan_generation(folder, jobs, tasks, variant_configs)
+    if args.dry_run:
+        for name in plan.load_failed: print(f"{'load_failed':<20} {name}.sce")
+        for v in plan.variants: print(f"{v.status:<20} {v.target_name}.sce")
+        print(f"--- Plan: {plan.summary()} ---")
+        return 0
+    print(f"--- Plan: {plan.summary()} ---")
+    overwrites = plan.count("overwrite")
+    if args.overwrite == "ask": overwrite = ask_overwrite(overwrites) if overwrites else False
+    else: overwrite = args.overwrite == "yes"
+    plan.apply_overwrite_policy(overwrite)
+
+    print(f"--- Generating {len(tasks)} variants x {len(scenarios)} scenarios with profile '{profile_name}' ---")
+    counts = Counter(); write_stats = WriteStats()
+    manifest_settings = dict(settings, write_manifest=not args.no_manifest and settings.get("write_manifest", True))
+    if args.manifest_dir: manifest_settings["manifest_dir"] = args.manifest_dir
+    manifest = open_manifest(manifest_settings, folder, source="cli", profile=profile_name, workers=workers, durability=durability)
+    start = time.perf_counter()
+    for job_result in run_generation(folder, jobs, tasks, variant_configs, workers=workers, durability=durability):
+        if manifest: manifest.add_job(job_result)
+        if job_result.error:
+            counts[job_result.error] += 1
+            print(f"{job_result.error:<20} {job_result.job.scenario_name}.sce")
+        if job_result.write_stats: write_stats.merge(job_result.write_stats)
+        for r in job_result.results:
+            counts[r.result] += 1
+            print(f"{r.result:<20} {r.target_name}.sce")
+    elapsed = time.perf_counter() - start
+    if manifest: manifest.close()
+
+    total = sum(counts.values())
+    print(f"--- Done: {total} results in {elapsed:.2f}s ({total / elapsed if elapsed > 0 else 0:.1f} files/s) ---")
+    for result, count in sorted(counts.items()): print(f"  {result:<20} {count}")
+    print(f"  {write_stats} (durability: {durability})")
+    if manifest: print(f"  Manifest: {manifest.path}")
+    if TIMINGS.enabled:
+        print(TIMINGS.report(total, elapsed))
+        if args.timing_json:
+            TIMINGS.export_json(args.timing_json, total, elapsed, profile=profile_name, workers=workers, durability=durability)
+            print(f"Timing report written to {args.timing_json}")
+    return 1 if any(counts[r] for r in FAILED_RESULTS) else 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "generate": return run_generate(args)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
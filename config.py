@@ -49,7 +49,13 @@ def detect_kovaaks_path():
     # Fallback: Return the standard Windows path even if it doesn't exist
     return str(steam_roots[0] / game_path_suffix)
 
-DEFAULT_KOVAAKS_PATH = detect_kovaaks_path()
+_detected_kovaaks_path = None
+
+def default_kovaaks_path():
+    """detect_kovaaks_path(), probed on first use only: the Steam roots can sit on slow or sleeping drives."""
+    global _detected_kovaaks_path
+    if _detected_kovaaks_path is None: _detected_kovaaks_path = detect_kovaaks_path()
+    return _detected_kovaaks_path
 
 
 # --- MASTER MODIFIER CONFIGURATION ---
@@ -0,0 +1,208 @@
+# generation_engine.py
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from scenario_logic import load_scenario, load_preview, render_composite, task_steps, get_naming_engine, get_target_bots, classify_gauntlet, gauntlet_skip_reason
+from variant_writer import VariantWriter
+from timing import TIMINGS, span
+from config import MODIFIER_CONFIG
+
+@dataclass
+class ScenarioJob:
+    scenario_name: str
+    selected_bots: list = None                        # None = every editable bot in the file
+    skip_targets: set = field(default_factory=set)    # target scenario names that must not be (over)written
+
+@dataclass
+class VariantResult:
+    scenario_name: str
+    variant_type: str   # "SIZE", or "SIZE+SPEED" for a composite task
+    value: int          # tuple of per-step values for a composite task
+    target_name: str
+    result: str   # success / unchanged / skipped_existing / skipped_incompatible / error_timelimit / name_not_found / error
+    bytes: int = 0
+    elapsed: float = 0.0   # seconds spent rendering + writing this file
+
+@dataclass
+class JobResult:
+    job: ScenarioJob
+    results: list
+    log: str              # everything the job logged, replayed by the caller in order
+    error: str = None     # set when the scenario itself could not be loaded
+    cancelled: bool = False
+    write_stats: object = None   # variant_writer.WriteStats
+    timings: dict = None         # timing samples recorded in a worker process, merged by run_generation
+
+@dataclass
+class PlannedVariant:
+    job: ScenarioJob
+    variant_type: str
+    value: int
+    target_name: str
+    status: str   # new / overwrite / incompatible
+
+@dataclass
+class GenerationPlan:
+    """Every target of a run, classified against one snapshot of the folder before anything is written."""
+    jobs: list
+    variants: list = field(default_factory=list)
+    load_failed: list = field(default_factory=list)   # scenario names that could not be read
+
+    def count(self, status): return sum(1 for v in self.variants if v.status == status)
+
+    def summary(self):
+        text = f"{self.count('new')} new, {self.count('overwrite')} to overwrite, {self.count('incompatible')} incompatible"
+        if self.load_failed: text += f", {len(self.load_failed)} scenario(s) unreadable"
+        return text
+
+    def apply_overwrite_policy(self, overwrite):
+        """One decision for the whole run: with overwrite=False every existing target is skipped."""
+        if overwrite: return
+        for v in self.variants:
+            if v.status == "overwrite": v.job.skip_targets.add(v.target_name)
+
+def resolve_worker_count(workers):
+    """0 or None means one worker per CPU core."""
+    if not workers: return os.cpu_count() or 1
+    return max(1, int(workers))
+
+def naming_configs(variant_configs):
+    """Strips GUI state from variant_configs so it can be sent to worker processes."""
+    return {key: {"tag_text": cfg["tag_text"], "suffix": cfg["suffix"]} for key, cfg in variant_configs.items()}
+
+def folder_snapshot(folder_path):
+    """normcase'd names of every .sce in the folder, from a single os.scandir pass."""
+    with os.scandir(folder_path) as it:
+        return {os.path.normcase(entry.name[:-4]) for entry in it if entry.name.lower().endswith(".sce")}
+
+def plan_generation(folder_path, jobs, tasks, variant_configs, cancel_event=None):
+    """
+    Computes every target name in memory and checks it against one directory snapshot.
+    Only the header-only preview parse is read per scenario (target bots + gauntlet type), so the
+    full parse happens once, in the job that generates it. Stops early if cancel_event is set.
+    """
+    variant_configs = naming_configs(variant_configs)
+    with span("plan.snapshot"): existing = folder_snapshot(folder_path)
+    naming = get_naming_engine(variant_configs)
+    plan = GenerationPlan(jobs)
+    for job in jobs:
+        if cancel_event and cancel_event.is_set(): break
+        scenario_data = load_preview(os.path.join(folder_path, job.scenario_name + ".sce"))
+        if not scenario_data:
+            plan.load_failed.append(job.scenario_name); continue
+        selected_bots = job.selected_bots if job.selected_bots is not None else get_target_bots(scenario_data)
+        gauntlet = classify_gauntlet(scenario_data, selected_bots)
+        with span("plan.names"):
+            for vtype, val in tasks:
+                target_name = naming.target_name(job.scenario_name, vtype, val)
+                if any(gauntlet_skip_reason(*gauntlet, step.upper()) for step, _ in task_steps(vtype, val)): status = "incompatible"
+                elif os.path.normcase(target_name) in existing: status = "overwrite"
+                else: status = "new"
+                plan.variants.append(PlannedVariant(job, vtype, val, target_name, status))
+    return plan
+
+def _generate_scenario(folder_path, job, tasks, variant_configs, log, cancel_event=None, on_progress=None, writer=None):
+    log(f"Processing: {job.scenario_name}...")
+    scenario_data = load_scenario(os.path.join(folder_path, job.scenario_name + ".sce"))
+    if not scenario_data:
+        log(f"❌ Could not load {job.scenario_name}, skipping.")
+        return [], "load_failed"
+    scenario_data["user_provided_name"] = job.scenario_name
+
+    selected_bots = job.selected_bots if job.selected_bots is not None else get_target_bots(scenario_data)
+    if not selected_bots and any(MODIFIER_CONFIG[step.upper()]['scope'] == 'Character Profile' for t in tasks for step, _ in task_steps(*t)):
+        log(f"   ⚠ No targets selected for {job.scenario_name}. Skipping character variants.")
+    writer = writer or VariantWriter()
+    naming = get_naming_engine(variant_configs)
+    prefixes = {}   # composite steps shared between combinations, rendered once
+
+    # Renders run here while the writer's threads put earlier variants on disk.
+    # Per-file log lines are held back so they still come out in task order once the writes are known.
+    results, deferred = [], []
+    for vtype, val in tasks:
+        if cancel_event is not None and cancel_event.is_set(): break
+        target_name = naming.target_name(job.scenario_name, vtype, val)
+        task_log, future = [], None
+        start = time.perf_counter()
+        if target_name in job.skip_targets:
+            task_log.append(f"⏩ Skipped: {target_name}.sce")
+            result = "skipped_existing"
+        else:
+            result, _, lines = render_composite(scenario_data, task_steps(vtype, val), variant_configs, selected_bots, log=task_log.append, prefixes=prefixes)
+            if lines is not None:
+                future = writer.submit(os.path.join(folder_path, target_name + ".sce"), lines)
+                result = "success"
+        results.append(VariantResult(job.scenario_name, vtype, val, target_name, result, elapsed=time.perf_counter() - start))
+        deferred.append((task_log, future))
+        if on_progress: on_progress(1)
+
+    failed_commits = writer.flush()
+    for variant, (task_log, future) in zip(results, deferred):
+        for line in task_log: log(line)
+        if future is None: continue
+        path = os.path.join(folder_path, variant.target_name + ".sce")
+        variant.elapsed += writer.write_seconds.get(path, 0.0)
+        error = future.exception() or failed_commits.get(path)
+        if error:
+            variant.result = "error"
+            log(f"❌ ERROR creating {path}: {error}")
+        elif future.result() is None:
+            variant.result = "unchanged"
+            log(f"➖ Unchanged: {variant.target_name}.sce")
+        else:
+            variant.bytes = future.result()
+            log(f"✅ Created: {variant.target_name}.sce")
+    return results, None
+
+def generate_scenario(folder_path, job, tasks, variant_configs, cancel_event=None, on_progress=None, durability="none", collect_timings=False):
+    """
+    Generates every (variant_type, value) task for one scenario. Runs in a worker process or thread.
+    collect_timings (process pool only) records this job's timing spans and returns them on the JobResult.
+    """
+    if collect_timings: TIMINGS.enable(); TIMINGS.reset()
+    log_lines = []
+    writer = VariantWriter(durability)
+    results, error = _generate_scenario(folder_path, job, tasks, variant_configs, log_lines.append, cancel_event, on_progress, writer)
+    cancelled = len(results) < len(tasks) and error is None
+    return JobResult(job, results, "".join(line + "\n" for line in log_lines), error, cancelled, writer.stats, TIMINGS.snapshot() if collect_timings else None)
+
+def run_generation(folder_path, jobs, tasks, variant_configs, workers=1, cancel_event=None, on_progress=None, durability="none"):
+    """
+    Generates tasks x jobs and yields a JobResult per scenario as each one completes.
+    Existing targets are not checked here: plan_generation() + apply_overwrite_policy() fill each
+    job's skip_targets beforehand.
+    With more than one worker, scenarios are fanned out to a process pool; the files written
+    are identical to the serial path because both run generate_scenario.
+
+    cancel_event (threading.Event) stops the serial path between files. In the pool it stops
+    submission and cancels queued scenarios; scenarios already running finish.
+    on_progress(count) is called as files are processed (per scenario in the pool).
+    durability is the variant_writer fsync mode; each scenario's files are one batch.
+    """
+    variant_configs = naming_configs(variant_configs)
+    workers = min(resolve_worker_count(workers), len(jobs))
+    is_cancelled = lambda: cancel_event is not None and cancel_event.is_set()
+
+    if workers <= 1:
+        for job in jobs:
+            if is_cancelled(): return
+            yield generate_scenario(folder_path, job, tasks, variant_configs, cancel_event, on_progress, durability)
+        return
+
+    # spawn, not fork: the GUI process has prefetch/scan/writer threads whose locks a forked child could inherit held
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = []
+        for job in jobs:
+            if is_cancelled(): break
+            futures.append(pool.submit(generate_scenario, folder_path, job, tasks, variant_configs, durability=durability, collect_timings=TIMINGS.enabled))
+        for future in as_completed(futures):
+            if is_cancelled():
+                for pending in futures: pending.cancel()
+            if future.cancelled(): continue
+            job_result = future.result()
+            if job_result.timings: TIMINGS.merge(job_result.timings)
+            if on_progress: on_progress(len(job_result.results))
+            yield job_result
@@ -26,11 +26,14 @@ LANGUAGES = {
         "button_edit_values": "Edit Values",
         "button_save_values": "Save Values",
         "button_generate": "Generate Variants",
+        "button_cancel": "Cancel",
         "frame_log": "Status Log",
+        "status_scanning": "Scanning… {count} files",
         "button_select_all": "Select All",
         "button_deselect_all": "Deselect All",
+        "checkbox_combine": "Combine",
         "dialog_overwrite_title": "Overwrite Confirmation",
-        "dialog_overwrite_text": 'The file "{filename}" already exists.\n\nHow would you like to proceed for this and all future conflicts in this batch?',
+        "dialog_plan_text": "This run creates {new} new file(s).\n{overwrite} file(s) already exist, {incompatible} variant(s) are incompatible and will be skipped.\n\nOverwrite the existing files?",
         "dialog_save_profile_title": "Save Profile As", # Not used anymore but okay to keep
         "dialog_save_profile_prompt": "Enter a name for the new profile:", # Not used anymore
         "dialog_rename_profile_title": "Rename Profile",
@@ -68,11 +71,14 @@ LANGUAGES = {
         "button_edit_values": "値を編集",
         "button_save_values": "値を保存",
         "button_generate": "派生シナリオを生成",
+        "button_cancel": "キャンセル",
         "frame_log": "ステータスログ",
+        "status_scanning": "スキャン中… {count} ファイル",
         "button_select_all": "すべて選択",
         "button_deselect_all": "すべて選択解除",
+        "checkbox_combine": "組み合わせ",
         "dialog_overwrite_title": "上書き確認",
-        "dialog_overwrite_text": 'ファイル "{filename}" は既に存在します。\n\nこのファイルおよび今後の競合に対してどのように処理しますか？',
+        "dialog_plan_text": "新規ファイル {new} 件を作成します。\n既存ファイル {overwrite} 件、非対応のためスキップされるバリアント {incompatible} 件があります。\n\n既存ファイルを上書きしますか？",
         "dialog_save_profile_title": "プロファイルを名前を付けて保存",
         "dialog_save_profile_prompt": "新しいプロファイルの名前を入力してください:",
         "dialog_rename_profile_title": "プロファイルの名前を変更",
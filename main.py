@@ -1,16 +1,41 @@
 # main.py
-import tkinter as tk
-from ttkthemes import ThemedTk
-from app_gui import VariantGeneratorApp
+import sys
+import time
+import multiprocessing
+
+def run_gui(profile_startup=False):
+    # --profile-startup: time each import/initialization step and print the table once the window is up
+    from timing import TIMINGS, span
+    TIMINGS.enable(profile_startup)
+    started = time.perf_counter()
+
+    with span("import.ttkthemes"): from ttkthemes import ThemedTk
+    with span("import.app_gui"): from app_gui import VariantGeneratorApp
 
-if __name__ == "__main__":
     # We use the 'black' theme as a base
-    root = ThemedTk(theme="black", themebg=True)
+    with span("tk.root"): root = ThemedTk(theme="black", themebg=True)
     
     # Define our "Chroma Key" color. 
     # Any pixel with this color will become fully transparent.
     # We use #000001 (almost pure black) to blend well with dark themes.
     root.wm_attributes('-transparentcolor', '#000001')
     
-    app = VariantGeneratorApp(root)
-    root.mainloop()
\ No newline at end of file
+    with span("app.init"): VariantGeneratorApp(root)
+    if profile_startup:
+        def report():
+            TIMINGS.add("first_frame", time.perf_counter() - started)
+            print("--- Startup profile ---\n" + TIMINGS.report(), file=sys.__stdout__)
+            TIMINGS.enable(False); TIMINGS.reset()
+        root.after_idle(report)
+    root.mainloop()
+
+if __name__ == "__main__":
+    # Required for the generation process pool in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
+
+    # Headless mode: python main.py generate --help
+    if len(sys.argv) > 1 and sys.argv[1] == "generate":
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    run_gui(profile_startup="--profile-startup" in sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,62 @@
+# manifest.py
+# One JSONL file per generation run: a "start" record, a "variant" record per file as results
+# arrive, and an "end" record with totals. Tools can act on exactly the files a run produced.
+import os
+import json
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from config import APP_DIR
+
+MANIFEST_DIR = os.path.join(APP_DIR, "manifests")   # next to settings.json unless settings name another folder
+
+def _now(): return datetime.now().isoformat(timespec="milliseconds")
+
+class RunManifest:
+    """
+    Streams one run's records to <folder>/run-YYYYmmdd-HHMMSS-<id>.jsonl. Every record is flushed
+    as it is written, so a crashed or cancelled run still leaves a usable manifest.
+
+        with RunManifest(folder_path, source="gui") as manifest:
+            manifest.add_job(job_result)
+    """
+    def __init__(self, scenario_folder, directory=None, **run_info):
+        self.run_id = uuid.uuid4().hex[:8]
+        directory = directory or MANIFEST_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"run-{datetime.now():%Y%m%d-%H%M%S}-{self.run_id}.jsonl")
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.counts = Counter()
+        self._record({"event": "start", "time": _now(), "folder": os.path.abspath(scenario_folder), **run_info})
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, *exc): self.close(cancelled=exc_type is not None)
+
+    def _record(self, record):
+        self.file.write(json.dumps({"run": self.run_id, **record}, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def add_job(self, job_result):
+        """Writes a record per variant of one generation_engine.JobResult."""
+        if job_result.error:
+            self.counts[job_result.error] += 1
+            self._record({"event": "variant", "time": _now(), "source": job_result.job.scenario_name, "modifier": None, "value": None,
+                          "target": None, "result": job_result.error, "bytes": 0, "elapsed_ms": 0.0})
+        for r in job_result.results:
+            self.counts[r.result] += 1
+            self._record({"event": "variant", "time": _now(), "source": r.scenario_name, "modifier": r.variant_type, "value": r.value,
+                          "target": r.target_name + ".sce", "result": r.result, "bytes": r.bytes, "elapsed_ms": round(r.elapsed * 1000, 3)})
+
+    def close(self, cancelled=False):
+        if self.file.closed: return
+        self._record({"event": "end", "time": _now(), "cancelled": cancelled, "results": dict(self.counts)})
+        self.file.close()
+
+def open_manifest(settings, scenario_folder, **run_info):
+    """RunManifest per the settings ('write_manifest', 'manifest_dir'), or None when disabled or unwritable."""
+    if not settings.get("write_manifest", True): return None
+    try: return RunManifest(scenario_folder, settings.get("manifest_dir") or None, **run_info)
+    except OSError as e:
+        print(f"❌ Could not create run manifest: {e}")
+        return None
@@ -0,0 +1,60 @@
+# prefetch.py
+# Background reads of the scenarios around the list selection, so stepping through the list with
+# the arrow keys finds them already parsed in the preview cache.
+import threading
+
+PREFETCH_NEIGHBOURS = 5     # scenarios read above and below the selection
+PREFETCH_TOP_RESULTS = 10   # first rows of the filtered list, read after every search
+
+def neighbour_order(items, selected, neighbours=PREFETCH_NEIGHBOURS, top=PREFETCH_TOP_RESULTS):
+    """Items to prefetch, nearest to the selection first (below, then above), then the top results."""
+    order = []
+    if selected is not None:
+        for step in range(1, neighbours + 1):
+            for i in (selected + step, selected - step):
+                if 0 <= i < len(items): order.append(items[i])
+    order += items[:top]
+    return list(dict.fromkeys(order))
+
+class Prefetcher:
+    """
+    One daemon thread calling loader(path) for the latest request only. request() replaces whatever
+    is still pending and cancel() drops it, so at most the file being read when the user types or
+    changes folder is finished. The loader must be thread-safe (load_preview is).
+
+        prefetcher = Prefetcher(load_preview)
+        prefetcher.request(paths)
+    """
+    def __init__(self, loader):
+        self.loader = loader
+        self.pending = []
+        self.condition = threading.Condition()
+        self.thread = None
+        self.loaded = 0      # files read by the thread
+        self.dropped = 0     # queued files discarded by request()/cancel()
+
+    def request(self, paths):
+        with self.condition:
+            self.dropped += len(self.pending)
+            self.pending = list(paths)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="scenario-prefetch", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def cancel(self):
+        with self.condition:
+            self.dropped += len(self.pending)
+            self.pending = []
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending: self.condition.wait()
+                path = self.pending.pop(0)
+            try: self.loader(path)
+            except Exception: pass   # a file that vanished or can't be read is reported when it is selected
+            with self.condition: self.loaded += 1
+
+    def stats_text(self):
+        return f"Prefetch: {self.loaded} read, {self.dropped} dropped"
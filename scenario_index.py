@@ -0,0 +1,189 @@
+# scenario_index.py
+import os
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+from config import APP_DIR
+from scenario_logic import preview_scenario_file, get_target_bots, classify_gauntlet
+
+# Lives next to settings.json
+INDEX_FILE = os.path.join(APP_DIR, "scenario_index.sqlite3")
+SCHEMA_VERSION = 2
+METADATA_BATCH = 200   # rows parsed per write transaction in fill_metadata()
+
+# parse_ok is NULL until fill_metadata() (or add_files()) has read the file
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    parse_ok INTEGER,
+    scenario_name TEXT,
+    player_profile_name TEXT,
+    bot_profiles TEXT,
+    timelimit REAL,
+    timescale REAL,
+    score_per_time REAL,
+    score_gauntlet INTEGER,
+    degen_gauntlet INTEGER,
+    PRIMARY KEY (folder, name)
+)
+"""
+METADATA_UPDATE = ("UPDATE scenarios SET mtime_ns = ?, size = ?, parse_ok = ?, scenario_name = ?, player_profile_name = ?, bot_profiles = ?, "
+                   "timelimit = ?, timescale = ?, score_per_time = ?, score_gauntlet = ?, degen_gauntlet = ? WHERE folder = ? AND name = ?")
+
+@dataclass
+class RefreshStats:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    def __str__(self):
+        return f"{self.added} new, {self.updated} changed, {self.removed} removed, {self.unchanged} unchanged"
+
+def folder_key(folder):
+    return os.path.normcase(os.path.abspath(folder))
+
+def scenario_metadata(file_path):
+    """The metadata columns for one .sce file, or None if it can't be read/parsed. Header-only read."""
+    try: data = preview_scenario_file(file_path)
+    except ValueError: data = None
+    if not data: return None
+    bots = get_target_bots(data)
+    is_score_gauntlet, is_degen_gauntlet = classify_gauntlet(data, bots)
+    props = data["global_properties"]
+    return (data["scenario_name"], data["player_profile_name"], json.dumps(bots),
+            props.get("Timelimit"), props.get("Timescale"), props.get("ScorePerTime"),
+            int(is_score_gauntlet), int(is_degen_gauntlet))
+
+def metadata_row(file_path):
+    """(mtime_ns, size, parse_ok, *metadata) for one file; stat is taken before the read so a later edit shows as changed."""
+    st = os.stat(file_path)
+    meta = scenario_metadata(file_path)
+    return (st.st_mtime_ns, st.st_size, int(meta is not None)) + (meta or (None,) * 8)
+
+class ScenarioIndex:
+    """
+    Persistent per-folder index of .sce files. refresh() is a single os.scandir pass that only
+    records names and (mtime_ns, size), so the list is available at directory-listing speed.
+    Metadata (target bots, gauntlet type, ...) is filled afterwards by fill_metadata() on a
+    background thread, and add_files() records files the generator just wrote.
+    """
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.conn = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS scenarios")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.execute(SCHEMA)
+        return self.conn
+
+    def refresh(self, folder, on_progress=None):
+        """
+        Brings the index for `folder` in line with the disk without reading any file.
+        New or changed files get a row with pending metadata. Returns (names, RefreshStats);
+        on_progress(seen_count) is called while scanning.
+        """
+        key = folder_key(folder)
+        stats = RefreshStats()
+        with self.lock:
+            conn = self._connect()
+            known = {name: (mtime_ns, size) for name, mtime_ns, size in conn.execute("SELECT name, mtime_ns, size FROM scenarios WHERE folder = ?", (key,))}
+            seen = []; upserts = []
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if not entry.name.lower().endswith(".sce"): continue
+                    name = entry.name[:-4]
+                    seen.append(name)
+                    if on_progress and len(seen) % 500 == 0: on_progress(len(seen))
+                    try: st = entry.stat()
+                    except OSError: continue
+                    if known.get(name) == (st.st_mtime_ns, st.st_size):
+                        stats.unchanged += 1; continue
+                    if name in known: stats.updated += 1
+                    else: stats.added += 1
+                    upserts.append((key, name, st.st_mtime_ns, st.st_size))
+            seen_set = set(seen)
+            removed = [(key, name) for name in known if name not in seen_set]
+            stats.removed = len(removed)
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO scenarios (folder, name, mtime_ns, size) VALUES (?, ?, ?, ?)", upserts)
+                conn.executemany("DELETE FROM scenarios WHERE folder = ? AND name = ?", removed)
+        if on_progress: on_progress(len(seen))
+        return sorted(seen, key=str.lower), stats
+
+    def scan(self, folder, on_progress=None):
+        """refresh(), falling back to a plain directory listing if the index can't be used."""
+        try: return self.refresh(folder, on_progress)
+        except sqlite3.Error as e:
+            print(f"Scenario index unavailable ({e}), listing folder directly.")
+            names = [filename[:-4] for filename in os.listdir(folder) if filename.lower().endswith(".sce")]
+            return sorted(names, key=str.lower), None
+
+    def fill_metadata(self, folder, should_stop=None):
+        """
+        Background pass: reads the files whose metadata is pending, METADATA_BATCH per transaction.
+        Files are read outside the lock, so lookups from the UI thread are never held up for long.
+        Returns the number of rows filled.
+        """
+        key = folder_key(folder)
+        with self.lock:
+            if self.closed: return 0
+            pending = [row[0] for row in self._connect().execute("SELECT name FROM scenarios WHERE folder = ? AND parse_ok IS NULL", (key,))]
+        filled = 0
+        for start in range(0, len(pending), METADATA_BATCH):
+            if should_stop and should_stop(): break
+            rows = []
+            for name in pending[start:start + METADATA_BATCH]:
+                try: rows.append(metadata_row(os.path.join(folder, name + ".sce")) + (key, name))
+                except OSError: continue   # deleted since the scan; the next refresh drops the row
+            with self.lock:
+                if self.closed: break
+                conn = self._connect()
+                with conn: conn.executemany(METADATA_UPDATE, rows)
+            filled += len(rows)
+        return filled
+
+    def add_files(self, folder, names):
+        """Records files written by the generator, metadata included, so the next refresh sees them as unchanged."""
+        key = folder_key(folder)
+        rows = []
+        for name in names:
+            try: rows.append((key, name) + metadata_row(os.path.join(folder, name + ".sce")))
+            except OSError: continue
+        with self.lock:
+            if self.closed: return
+            conn = self._connect()
+            with conn: conn.executemany("INSERT OR REPLACE INTO scenarios VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def get(self, folder, name):
+        """Stored metadata for one scenario as a dict, or None if it is pending or the file changed since."""
+        try: st = os.stat(os.path.join(folder, name + ".sce"))
+        except OSError: return None
+        with self.lock:
+            if self.closed: return None
+            cur = self._connect().execute("SELECT * FROM scenarios WHERE folder = ? AND name = ?", (folder_key(folder), name))
+            row = cur.fetchone()
+            columns = [c[0] for c in cur.description]
+        if not row: return None
+        record = dict(zip(columns, row))
+        if not record["parse_ok"] or (record["mtime_ns"], record["size"]) != (st.st_mtime_ns, st.st_size): return None
+        record["bot_profiles"] = json.loads(record["bot_profiles"]) if record["bot_profiles"] else []
+        return record
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.conn is not None: self.conn.close(); self.conn = None
+
+SCENARIO_INDEX = ScenarioIndex()
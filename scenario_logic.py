@@ -2,12 +2,66 @@
 import os
 import re
 import json
-from config import MODIFIER_CONFIG, SETTINGS_FILE, DEFAULT_KOVAAKS_PATH
+import itertools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from config import MODIFIER_CONFIG, SETTINGS_FILE, default_kovaaks_path
+from variant_writer import write_atomic, encode_lines, same_content
+from timing import span
 
 def get_variant_tag(tag_text, suffix, value):
     if suffix == "s": return f"{tag_text} {value}s"
     else: return f"{tag_text} {value}%"
 
+# --- NAMING ENGINE ---
+NAMING_CACHE_LIMIT = 200000   # memoized names per engine before the caches are dropped
+
+class NamingEngine:
+    """
+    The variant-tag swap patterns of one profile (variant_configs), compiled once.
+    target_name() is calculate_target_filename (composite tasks stack one tag per step), memoized per name.
+    """
+    def __init__(self, variant_configs):
+        self.tags = {key.upper(): (cfg['tag_text'], cfg['suffix']) for key, cfg in variant_configs.items()}
+        self.swap_patterns = {}
+        for key, (tag_text, suffix) in self.tags.items():
+            value_pattern = r'\d+%' if suffix == '%' else r'\d+s?'
+            self.swap_patterns[key] = re.compile(r' (\b' + re.escape(tag_text) + r'\b ' + value_pattern + ')')
+        self._targets = {}
+
+    def target_name(self, base_name, variant_type, value):
+        """Swap vs Stack: Direct modifiers (Duration) replace an existing tag of their kind, the rest append."""
+        key = (base_name, variant_type, value)
+        name = self._targets.get(key)
+        if name is None:
+            if len(self._targets) >= NAMING_CACHE_LIMIT: self._targets.clear()
+            if isinstance(value, tuple):
+                # Composite: each step names the previous step's output, as if generated one after another
+                name = base_name
+                for step_type, step_value in task_steps(variant_type, value): name = self.target_name(name, step_type, step_value)
+                self._targets[key] = name
+                return name
+            v_key_upper = variant_type.upper()
+            tag_text, suffix = self.tags[v_key_upper]
+            variant_tag = get_variant_tag(tag_text, suffix, value)
+            match = self.swap_patterns[v_key_upper].search(base_name)
+            if match and MODIFIER_CONFIG[v_key_upper]['mod_type'] == 'Direct':
+                name = base_name.replace(match.group(1), f" {variant_tag}")
+            else:
+                name = f"{base_name} {variant_tag}"
+            self._targets[key] = name
+        return name
+
+_naming_engines = {}
+
+def get_naming_engine(variant_configs):
+    """The shared NamingEngine for these tags/suffixes; built on first use."""
+    key = tuple((k, cfg['tag_text'], cfg['suffix']) for k, cfg in variant_configs.items())
+    engine = _naming_engines.get(key)
+    if engine is None: engine = _naming_engines[key] = NamingEngine(variant_configs)
+    return engine
+
 def get_base_scenario_name(full_name, current_tags):
     base_name = full_name
     for tag in current_tags:
@@ -17,26 +71,10 @@ def get_base_scenario_name(full_name, current_tags):
 
 def calculate_target_filename(base_name, variant_type, value, variant_configs):
     """Calculates the final filename using the Swap vs Stack logic."""
-    config = MODIFIER_CONFIG[variant_type.upper()]
-    ui_config = variant_configs[variant_type.upper()]
-    variant_tag = get_variant_tag(ui_config['tag_text'], ui_config['suffix'], value)
-    
-    current_tag_text = ui_config['tag_text']
-    existing_tag_pattern = r' (\b' + re.escape(current_tag_text) + r'\b \d+s?)'
-    if ui_config['suffix'] == '%':
-         existing_tag_pattern = r' (\b' + re.escape(current_tag_text) + r'\b \d+%)'
-    
-    match = re.search(existing_tag_pattern, base_name)
-    
-    # LOGIC: Swap ONLY if Direct (Duration), otherwise Stack
-    if match and config['mod_type'] == 'Direct':
-        new_name = base_name.replace(match.group(1), f" {variant_tag}")
-    else:
-        new_name = f"{base_name} {variant_tag}"
-        
-    return new_name
-
-def get_default_profile():
+    return get_naming_engine(variant_configs).target_name(base_name, variant_type, value)
+
+def get_default_profile(folder_path=None):
+    # folder_path=None probes the Steam libraries; pass "" when only the variant defaults are needed
     # 1. Define the available values
     # (Updated Timescale list to start with 40 as requested)
     size_vals = [50, 60, 70, 80, 90, 110, 120, 130, 140, 150, 200]
@@ -47,7 +85,7 @@ def get_default_profile():
     regen_vals = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
 
     profile = {
-        "folder_path": DEFAULT_KOVAAKS_PATH,
+        "folder_path": folder_path if folder_path is not None else default_kovaaks_path(),
         "size_percentages": size_vals,
         "speed_percentages": speed_vals,
         "timescale_percentages": timescale_vals,
@@ -55,7 +93,8 @@ def get_default_profile():
         "hp_percentages": hp_vals,
         "regen_percentages": regen_vals,
         "checkboxes": {}, 
-        "variant_tags": {key: config['tag_text'] for key, config in MODIFIER_CONFIG.items()}
+        "variant_tags": {key: config['tag_text'] for key, config in MODIFIER_CONFIG.items()},
+        "composite_modifiers": []   # modifiers whose checked values are combined (cross product) instead of generated alone
     }
 
     # 2. Define exactly which values should be CHECKED by default.
@@ -79,6 +118,45 @@ def get_default_profile():
             
     return profile
 
+def get_profile_variant_configs(profile):
+    """The tag/suffix view of a settings profile that calculate_target_filename expects."""
+    return {key: {"tag_text": profile["variant_tags"].get(key, config['tag_text']), "suffix": config['suffix']} for key, config in MODIFIER_CONFIG.items()}
+
+def get_profile_tasks(profile):
+    """(variant_type, value) pairs for every checked value in a settings profile, in GUI order."""
+    checked = {key: [value for i, value in enumerate(profile.get(config['value_key'], [])) if profile["checkboxes"].get(f"{key}_{i}")]
+               for key, config in MODIFIER_CONFIG.items()}
+    return build_tasks(checked, profile.get("composite_modifiers", []))
+
+# --- COMPOSITE TASKS ---
+# A composite task is ("SIZE+SPEED", (70, 120)): one file with every step applied in MODIFIER_CONFIG order.
+COMPOSITE_SEPARATOR = "+"
+
+def task_steps(variant_type, value):
+    """[(variant_type, value), ...] for a single or composite task."""
+    if isinstance(value, tuple): return list(zip(variant_type.split(COMPOSITE_SEPARATOR), value))
+    return [(variant_type, value)]
+
+def build_tasks(checked, composite_modifiers=()):
+    """
+    checked: {modifier: [checked values]} in GUI order. Modifiers in composite_modifiers are combined
+    into one task per combination (when at least two of them have checked values); the rest stay single.
+    """
+    combined = [key for key, values in checked.items() if key in composite_modifiers and values]
+    if len(combined) < 2: combined = []
+    tasks = [(key, value) for key, values in checked.items() if key not in combined for value in values]
+    if combined:
+        composite_key = COMPOSITE_SEPARATOR.join(combined)
+        tasks += [(composite_key, values) for values in itertools.product(*(checked[key] for key in combined))]
+    return tasks
+
+def count_combinations(tasks): return sum(1 for vtype, value in tasks if isinstance(value, tuple))
+
+def cached_kovaaks_path(settings):
+    """Steam library probe for profiles without a folder, run once and remembered in settings."""
+    if not settings.get("detected_folder_path"): settings["detected_folder_path"] = default_kovaaks_path()
+    return settings["detected_folder_path"]
+
 def save_settings(settings_data):
     try:
         for profile in settings_data.get("profiles", {}).values():
@@ -96,10 +174,16 @@ def load_settings():
             # 1. Basic Global Checks
             if "language" not in settings: settings["language"] = "EN"
             if "last_active_profile" not in settings: settings["last_active_profile"] = "Default"
-            if "profiles" not in settings: settings["profiles"] = {"Default": get_default_profile()}
+            if "profiles" not in settings: settings["profiles"] = {"Default": get_default_profile(cached_kovaaks_path(settings))}
+            if "generation_workers" not in settings: settings["generation_workers"] = 0  # 0 = one per CPU core
+            if "write_durability" not in settings: settings["write_durability"] = "none"  # none / batch / file
+            if "timing_report" not in settings: settings["timing_report"] = False  # per-phase timing table after each run
+            if "timing_export" not in settings: settings["timing_export"] = ""     # optional JSON path for that table
+            if "write_manifest" not in settings: settings["write_manifest"] = True  # JSONL record of every run
+            if "manifest_dir" not in settings: settings["manifest_dir"] = ""        # "" = manifests/ next to settings.json
             
             # 2. Migration & Repair Logic
-            default_profile = get_default_profile()
+            default_profile = get_default_profile(folder_path="")
             
             for pname, profile in settings["profiles"].items():
                 # Migration: Old "percentages" to specific keys
@@ -109,6 +193,7 @@ def load_settings():
                     profile["speed_percentages"] = profile.get("percentages", default_profile["speed_percentages"])
                     profile["timescale_percentages"] = profile.get("percentages", default_profile["timescale_percentages"])
                 
+                if "folder_path" not in profile: profile["folder_path"] = cached_kovaaks_path(settings)
                 # Repair: Fill in ANY missing keys from the default profile
                 # This prevents crashes if we add new features (like checkboxes or regen_percentages)
                 for key, default_val in default_profile.items():
@@ -124,318 +209,476 @@ def load_settings():
             
     except (FileNotFoundError, json.JSONDecodeError):
         # Fresh start
-        return {"language": "EN", "last_active_profile": "Default", "profiles": {"Default": get_default_profile()}}
+        settings = {"language": "EN", "last_active_profile": "Default", "generation_workers": 0, "write_durability": "none", "timing_report": False, "timing_export": "", "write_manifest": True, "manifest_dir": ""}
+        settings["profiles"] = {"Default": get_default_profile(cached_kovaaks_path(settings))}
+        return settings
 
-def parse_scenario_file(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8-sig') as f: lines = f.readlines()
-    except Exception: return None
-    
-    extracted_data = { 
-        "all_lines": lines, 
-        "scenario_name": "N/A", 
-        "player_profile_name": None, 
-        "character_profiles": {}, 
-        "global_properties": {},
-        "derived_bot_profiles": [],
-    }
-    
-    bot_characters_str = ""
-    added_bots_str = ""
-    bot_profile_map = {} 
-    in_bot_profile_section = False
-    current_bot_profile_name = None
-
-    in_any_section = False
-    
-    for line in lines:
+# --- SCENARIO IR ---
+# Property lookups the tokenizer needs on every line, built once from MODIFIER_CONFIG.
+GLOBAL_PROPERTY_KEYS = {prop.lower(): prop for cfg in MODIFIER_CONFIG.values() if cfg['scope'] == 'Global' for prop in cfg['properties']}
+CHARACTER_PROPERTY_KEYS = set()
+for _cfg in MODIFIER_CONFIG.values():
+    if _cfg['scope'] == 'Character Profile':
+        CHARACTER_PROPERTY_KEYS.update(_cfg['properties'])
+        if _cfg.get('calculation_base'): CHARACTER_PROPERTY_KEYS.add(_cfg['calculation_base'])
+
+SCORE_METRIC_KEYS = {"scoreperhit": "ScorePerHit", "scoreperdamage": "ScorePerDamage", "scoreperkill": "ScorePerKill"}
+CHARACTER_EXTRA_KEYS = {"healthregenpersec": "HealthRegenPerSec", "minrespawndelay": "MinRespawnDelay", "maxrespawndelay": "MaxRespawnDelay"}
+
+@dataclass
+class KeyLine:
+    """One `Key=Value` line: its index in all_lines, the key as written and the stripped value."""
+    index: int
+    key: str
+    value: str
+
+@dataclass
+class SectionSpan:
+    """A `[Section]` block covering lines[start:end]. `name` is the first Name= inside it, if any."""
+    header: str
+    start: int
+    end: int = -1
+    name: str = None
+
+@dataclass
+class ScenarioIR:
+    all_lines: list
+    header_end: int = 0
+    sections: list = field(default_factory=list)
+    header_keys: dict = field(default_factory=dict)     # key.lower() -> [KeyLine] before the first section
+    profile_keys: dict = field(default_factory=dict)    # character profile name -> key.lower() -> [KeyLine]
+    scenario_name: str = "N/A"
+    player_profile_name: str = None
+    global_properties: dict = field(default_factory=dict)
+    character_profiles: dict = field(default_factory=dict)
+    bot_profile_map: dict = field(default_factory=dict)
+    active_bot_names: list = field(default_factory=list)
+    derived_bot_profiles: list = field(default_factory=list)
+
+    def to_scenario_data(self):
+        """Adapter to the dict shape the GUI and create_variant_file work with."""
+        return {
+            "all_lines": self.all_lines,
+            "scenario_name": self.scenario_name,
+            "player_profile_name": self.player_profile_name,
+            "character_profiles": self.character_profiles,
+            "global_properties": self.global_properties,
+            "derived_bot_profiles": self.derived_bot_profiles,
+            "scenario_ir": self,
+            "variant_plans": {},   # get_variant_plan() memo; shared by every copy ScenarioCache hands out
+        }
+
+class ScenarioTokenizer:
+    """Single-pass, line-at-a-time tokenizer producing a ScenarioIR."""
+    def __init__(self):
+        self.ir = ScenarioIR(all_lines=[])
+        self.in_any_section = False
+        self.in_bot_profile_section = False
+        self.in_char_profile_section = False
+        self.current_section = None
+        self.current_bot_profile_name = None
+        self.current_profile_name = None
+        self.bot_characters_str = ""
+        self.added_bots_str = ""
+
+    def feed(self, line):
+        ir = self.ir
+        index = len(ir.all_lines)
+        ir.all_lines.append(line)
         line_strip = line.strip()
-        if line_strip.startswith('['): 
-            in_any_section = True
 
-            if line_strip.lower() == "[bot profile]":
-                in_bot_profile_section = True
-                current_bot_profile_name = None
-            else:
-                in_bot_profile_section = False
-            continue
+        if line_strip.startswith('['):
+            if not self.in_any_section: ir.header_end = index
+            if self.current_section: self.current_section.end = index
+            self.current_section = SectionSpan(header=line_strip, start=index)
+            ir.sections.append(self.current_section)
+            self.in_any_section = True
+            section_lower = line_strip.lower()
+            self.in_bot_profile_section = section_lower == "[bot profile]"
+            self.in_char_profile_section = section_lower == "[character profile]"
+            self.current_bot_profile_name = None
+            self.current_profile_name = None
+            return
+
+        if '=' not in line_strip: return
 
-        if '=' not in line: continue
-        
-        key_part, value_part = line.split('=', 1)
-        key = key_part.strip().lower()
+        key_part, value_part = line_strip.split('=', 1)
+        key = key_part.strip()
+        key_lower = key.lower()
         value = value_part.strip()
-        
-        if key == "playercharacters": extracted_data["player_profile_name"] = value.split('.')[0]
-        
-        if not in_any_section:
-            if key == "name": extracted_data["scenario_name"] = value
-            if key == "botcharacters": bot_characters_str = value
-            if key == "addedbots": added_bots_str = value
-            
-            # --- START UPDATE: Capture Type 1 & Type 2 Specifics ---
-            if key == "scorepertime": extracted_data['global_properties']["ScorePerTime"] = float(value)
-            
-            for mod_key, config in MODIFIER_CONFIG.items():
-                if config['scope'] == 'Global':
-                    for prop in config['properties']:
-                        if key == prop.lower(): extracted_data['global_properties'][prop] = float(value)
-            
-            # Scoring metrics
-            if key == "scoreperhit": extracted_data['global_properties']["ScorePerHit"] = float(value)
-            elif key == "scoreperdamage": extracted_data['global_properties']["ScorePerDamage"] = float(value)
-            elif key == "scoreperkill": extracted_data['global_properties']["ScorePerKill"] = float(value)
-            # --- END UPDATE ---
-
-        if in_bot_profile_section:
-                if key == "name": current_bot_profile_name = value
-                if key == "characterprofile" and current_bot_profile_name:
-                    bot_profile_map[current_bot_profile_name] = value
-
-        active_bots_raw = bot_characters_str if bot_characters_str else added_bots_str
-        active_bot_names = []
-        if active_bots_raw:
-            for raw_bot in active_bots_raw.split(';'):
-                if raw_bot.strip():
-                    clean_name = raw_bot.strip()
-                    if clean_name.lower().endswith(".bot"): clean_name = clean_name[:-4]
-                    active_bot_names.append(clean_name)
-
-            valid_targets = set()
-            for bot_name in active_bot_names:
-                char_profile = bot_profile_map.get(bot_name)
-                if char_profile: valid_targets.add(char_profile)
-
-            extracted_data["derived_bot_profiles"] = list(valid_targets)
-
-    current_profile_name = None
-    in_char_profile_section = False
-    
-    for line in lines:
-        line_strip = line.strip()
-        if line_strip.lower() == "[character profile]": 
-            in_char_profile_section = True
-            current_profile_name = None
-            continue
-        if in_char_profile_section and line_strip.startswith('['): 
-            in_char_profile_section = False
-            current_profile_name = None
-            continue
-            
-        if in_char_profile_section:
-            if '=' not in line_strip: continue
-            key, value = line_strip.split('=', 1)
-            key, value = key.strip(), value.strip()
-            
-            if key.lower() == "name":
-                current_profile_name = value
-                if current_profile_name not in extracted_data["character_profiles"]: 
-                    extracted_data["character_profiles"][current_profile_name] = {}
-            
-            if current_profile_name:
-                all_char_props = set()
-                for cfg in MODIFIER_CONFIG.values():
-                    if cfg['scope'] == 'Character Profile':
-                        all_char_props.update(cfg['properties'])
-                        if cfg.get('calculation_base'): all_char_props.add(cfg['calculation_base'])
-                
-                # --- START UPDATE: Capture Regen & Respawn Delays ---
-                if key.lower() == "healthregenpersec":
-                    extracted_data["character_profiles"][current_profile_name]["HealthRegenPerSec"] = float(value)
-                if key.lower() == "minrespawndelay":
-                    extracted_data["character_profiles"][current_profile_name]["MinRespawnDelay"] = float(value)
-                if key.lower() == "maxrespawndelay":
-                    extracted_data["character_profiles"][current_profile_name]["MaxRespawnDelay"] = float(value)
-                # --- END UPDATE ---
-
-                if key in all_char_props:
-                    extracted_data["character_profiles"][current_profile_name][key] = float(value)
-                    
-    return extracted_data
-
-def create_variant_file(base_data, folder_path, variant_type_key, new_value, variant_configs, selected_bots):
-    user_provided_name = base_data['user_provided_name'].strip()
-    internal_name_to_replace = base_data['scenario_name'].strip()
-    multiplier = new_value / 100.0
-    config = MODIFIER_CONFIG[variant_type_key.upper()]
-    v_key_upper = variant_type_key.upper()
-    
-    # --- DETECT SCENARIO TYPES ---
+
+        if key_lower == "playercharacters": ir.player_profile_name = value.split('.')[0]
+
+        if not self.in_any_section:
+            ir.header_keys.setdefault(key_lower, []).append(KeyLine(index, key, value))
+            if key_lower == "name": ir.scenario_name = value
+            elif key_lower == "botcharacters": self.bot_characters_str = value
+            elif key_lower == "addedbots": self.added_bots_str = value
+            elif key_lower == "scorepertime": ir.global_properties["ScorePerTime"] = float(value)
+            elif key_lower in GLOBAL_PROPERTY_KEYS: ir.global_properties[GLOBAL_PROPERTY_KEYS[key_lower]] = float(value)
+            elif key_lower in SCORE_METRIC_KEYS: ir.global_properties[SCORE_METRIC_KEYS[key_lower]] = float(value)
+            return
+
+        if key_lower == "name" and self.current_section.name is None: self.current_section.name = value
+
+        if self.in_bot_profile_section:
+            if key_lower == "name": self.current_bot_profile_name = value
+            if key_lower == "characterprofile" and self.current_bot_profile_name:
+                ir.bot_profile_map[self.current_bot_profile_name] = value
+
+        elif self.in_char_profile_section:
+            if key_lower == "name":
+                self.current_profile_name = value
+                ir.character_profiles.setdefault(value, {})
+            if self.current_profile_name:
+                profile = ir.character_profiles[self.current_profile_name]
+                ir.profile_keys.setdefault(self.current_profile_name, {}).setdefault(key_lower, []).append(KeyLine(index, key, value))
+                if key_lower in CHARACTER_EXTRA_KEYS: profile[CHARACTER_EXTRA_KEYS[key_lower]] = float(value)
+                if key in CHARACTER_PROPERTY_KEYS: profile[key] = float(value)
+
+    def has_preview_fields(self):
+        """True once every active bot's [Bot Profile] and the [Character Profile] it uses have been read."""
+        if not self.in_any_section: return False
+        ir = self.ir
+        active_bots_raw = self.bot_characters_str if self.bot_characters_str else self.added_bots_str
+        bot_names = [name.strip() for name in active_bots_raw.split(';') if name.strip()]
+        if not bot_names: return False   # targets fall back to every non-player profile: read them all
+        for bot_name in bot_names:
+            if bot_name.lower().endswith(".bot"): bot_name = bot_name[:-4]
+            if ir.bot_profile_map.get(bot_name) not in ir.character_profiles: return False
+        return True
+
+    def finish(self):
+        ir = self.ir
+        if self.current_section: self.current_section.end = len(ir.all_lines)
+        else: ir.header_end = len(ir.all_lines)
+
+        # Resolve which character profiles the active bots actually use
+        active_bots_raw = self.bot_characters_str if self.bot_characters_str else self.added_bots_str
+        for raw_bot in active_bots_raw.split(';'):
+            clean_name = raw_bot.strip()
+            if not clean_name: continue
+            if clean_name.lower().endswith(".bot"): clean_name = clean_name[:-4]
+            ir.active_bot_names.append(clean_name)
+        for bot_name in ir.active_bot_names:
+            char_profile = ir.bot_profile_map.get(bot_name)
+            if char_profile and char_profile not in ir.derived_bot_profiles: ir.derived_bot_profiles.append(char_profile)
+        return ir
+
+def tokenize_scenario(lines):
+    tokenizer = ScenarioTokenizer()
+    for line in lines: tokenizer.feed(line)
+    return tokenizer.finish()
+
+def parse_scenario_file(file_path):
+    with span("parse"):
+        try:
+            with open(file_path, 'r', encoding='utf-8-sig') as f: lines = f.readlines()
+        except Exception: return None
+        return tokenize_scenario(lines).to_scenario_data()
+
+def preview_scenario_file(file_path):
+    """
+    Header-only parse for the scenario preview: stops at the first section boundary once the target
+    bots' profiles are known, so map data and weapon profiles are never read. all_lines is partial
+    and the result is marked "preview"; generation must use load_scenario().
+    """
+    with span("preview"):
+        tokenizer = ScenarioTokenizer()
+        try:
+            with open(file_path, 'r', encoding='utf-8-sig') as f:
+                for line in f:
+                    if line.lstrip().startswith('[') and tokenizer.has_preview_fields(): break
+                    tokenizer.feed(line)
+        except Exception: return None
+        data = tokenizer.finish().to_scenario_data()
+        data["preview"] = True
+        return data
+
+# --- PARSE CACHE ---
+class ScenarioCache:
+    """
+    LRU cache in front of parse_scenario_file (or another parser, e.g. preview_scenario_file). Entries are validated against os.stat
+    (mtime_ns, size) on every lookup and bounded by entry count and total line bytes.
+    Callers get a shallow copy, so setting keys like user_provided_name never leaks
+    into the cached entry; all_lines is shared and must be treated as read-only, and
+    variant_plans is shared so compiled plans ride along with the cached entry.
+    """
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024, parser=parse_scenario_file, label="Parse cache"):
+        self.parser = parser
+        self.label = label
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()   # normalized path -> (mtime_ns, size, data, nbytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, file_path):
+        key = os.path.normcase(os.path.abspath(file_path))
+        try: st = os.stat(file_path)
+        except OSError: return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[2])
+            self.misses += 1
+
+        data = self.parser(file_path)
+        if data is None: return None
+        nbytes = sum(len(line) for line in data["all_lines"])
+        with self.lock:
+            self._discard(key)
+            self.entries[key] = (st.st_mtime_ns, st.st_size, data, nbytes)
+            self.total_bytes += nbytes
+            while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                self._discard(next(iter(self.entries)))
+        return dict(data)
+
+    def _discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry: self.total_bytes -= entry[3]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear(); self.total_bytes = 0
+
+    def stats_text(self):
+        return f"{self.label}: {self.hits} hits / {self.misses} misses, {len(self.entries)} files ({self.total_bytes / 1024:.0f} KiB)"
+
+SCENARIO_CACHE = ScenarioCache()
+PREVIEW_CACHE = ScenarioCache(max_entries=4096, max_bytes=16 * 1024 * 1024, parser=preview_scenario_file, label="Preview cache")
+
+def load_scenario(file_path):
+    """Cached parse_scenario_file. Use this everywhere a scenario is read for generation."""
+    return SCENARIO_CACHE.get(file_path)
+
+def load_preview(file_path):
+    """Cached preview_scenario_file: name, globals and target profiles for display, without the full file."""
+    return PREVIEW_CACHE.get(file_path)
+
+def get_target_bots(scenario_data):
+    """Editable bot profiles: the ones the scenario's bots resolve to, else every non-player profile."""
+    all_profiles = scenario_data.get("character_profiles", {})
+    bots = scenario_data.get("derived_bot_profiles", [])
+    if not bots:
+        player_name = scenario_data.get("player_profile_name")
+        bots = [name for name in all_profiles.keys() if name != player_name]
+    return [b for b in bots if b in all_profiles]
+
+# --- VARIANT PLAN ---
+RESPAWN_DELAY_KEYS = ("minrespawndelay", "maxrespawndelay")
+
+def classify_gauntlet(base_data, selected_bots):
+    """Returns (is_score_gauntlet, is_degen_gauntlet) for the given target bots."""
     # Type 1: Score-Based Gauntlet (ScorePerTime != 0)
     is_score_gauntlet = base_data['global_properties'].get("ScorePerTime", 0) != 0
-    
     # Type 2: Degeneration Gauntlet (HealthRegenPerSec < 0 on ANY selected bot)
-    is_degen_gauntlet = False
-    for bot_name in selected_bots:
-        bot_regen = base_data["character_profiles"].get(bot_name, {}).get("HealthRegenPerSec", 0)
-        if bot_regen < 0:
-            is_degen_gauntlet = True
-            break
-            
-    # --- SKIP LOGIC ---
-    if is_score_gauntlet:
+    is_degen_gauntlet = any(base_data["character_profiles"].get(bot_name, {}).get("HealthRegenPerSec", 0) < 0 for bot_name in selected_bots)
+    return is_score_gauntlet, is_degen_gauntlet
+
+def gauntlet_skip_reason(is_score_gauntlet, is_degen_gauntlet, v_key_upper):
+    """Why a modifier can't be applied to this gauntlet type, or None."""
+    if is_score_gauntlet and v_key_upper in ("DURATION", "HP"): return "Type 1: Score Gauntlet"
+    if is_degen_gauntlet and v_key_upper in ("HP", "REGEN_RATE"): return "Type 2: Degen Gauntlet"
+    return None
+
+class VariantPlan:
+    """
+    Everything create_variant_file needs from one scenario + bot selection, compiled once.
+    For each modifier it records the exact lines to patch as
+    (line_index, key, base_value, kind, format, needs_positive_multiplier) ops,
+    so emitting a variant only touches those lines.
+    """
+    def __init__(self, base_data, selected_bots):
+        self.base_data = base_data
+        self.lines = base_data["all_lines"]
+        self.ir = base_data.get("scenario_ir") or tokenize_scenario(self.lines)
+        self.selected_bots = set(selected_bots)
+        self.is_score_gauntlet, self.is_degen_gauntlet = classify_gauntlet(base_data, selected_bots)
+
+        internal_name = base_data['scenario_name'].strip().lower()
+        self.name_lines = [(kl.index, kl.key) for kl in self.ir.header_keys.get("name", []) if kl.value.lower() == internal_name]
+
+        self.base_timelimit = base_data['global_properties'].get("Timelimit", 0)
+        self.base_timescale = base_data['global_properties'].get("Timescale", 1.0)
+        self._ops = {}
+
+    def skip_reason(self, v_key_upper):
+        return gauntlet_skip_reason(self.is_score_gauntlet, self.is_degen_gauntlet, v_key_upper)
+
+    def ops_for(self, v_key_upper):
+        if v_key_upper not in self._ops: self._ops[v_key_upper] = self._compile(v_key_upper)
+        return self._ops[v_key_upper]
+
+    def _compile(self, v_key_upper):
+        config = MODIFIER_CONFIG[v_key_upper]
+        prop_keys = {p.lower() for p in config['properties']}
+        global_props = self.base_data['global_properties']
+        ops = []
+
+        # 1. Global Properties
+        for key_lower, key_lines in self.ir.header_keys.items():
+            for kl in key_lines:
+                if v_key_upper == "DURATION":
+                    if key_lower == "timelimit":
+                        ops.append((kl.index, kl.key, 0, "timelimit", ".1f", False))
+                    elif key_lower in SCORE_METRIC_KEYS:
+                        base_val = global_props.get(kl.key, 0)
+                        if base_val > 0: ops.append((kl.index, kl.key, base_val, "score", ".3f", False))
+
+                elif v_key_upper == "TIMESCALE":
+                    if key_lower in prop_keys:
+                        ops.append((kl.index, kl.key, global_props.get(kl.key, 1.0), "mul", ".3f", False))
+                    elif key_lower == "timelimit":
+                        base_val = global_props.get("Timelimit", 0)
+                        if base_val > 0: ops.append((kl.index, kl.key, base_val, "mul", ".1f", False))
+                    # Type 1 Fix: ScorePerTime
+                    elif key_lower == "scorepertime":
+                        if self.is_score_gauntlet: ops.append((kl.index, kl.key, global_props.get("ScorePerTime", 0), "div", ".3f", True))
+                    # Standard Scoring
+                    elif key_lower in SCORE_METRIC_KEYS:
+                        base_val = global_props.get(kl.key, 0)
+                        if base_val > 0: ops.append((kl.index, kl.key, base_val, "div", ".3f", True))
+
+        # 2. Character Profile Logic (target bots only)
+        for profile_name, profile_keys in self.ir.profile_keys.items():
+            if profile_name not in self.selected_bots: continue
+            base_profile = self.base_data["character_profiles"].get(profile_name, {})
+            for key_lower, key_lines in profile_keys.items():
+                for kl in key_lines:
+                    # A. Standard Logic (Only if config scope matches)
+                    if config['scope'] == 'Character Profile' and key_lower in prop_keys:
+                        # Skip MaxHealth standard edit if we are overriding it below
+                        should_skip_standard = key_lower == "maxhealth" and ((self.is_score_gauntlet and v_key_upper == "TIMESCALE") or (self.is_degen_gauntlet and v_key_upper == "DURATION"))
+                        if not should_skip_standard:
+                            if config['mod_type'] == 'Multiplier':
+                                base_val = base_profile.get(kl.key, 0)
+                                if not (config['condition'] == "value > 0" and not base_val > 0):
+                                    ops.append((kl.index, kl.key, base_val, "mul", ".5f", False))
+                            elif config['mod_type'] == 'Calculated':
+                                ops.append((kl.index, kl.key, base_profile.get(config['calculation_base'], 0), "mul", ".5f", False))
+
+                    # B. Special Logic: Type 1 (Score Gauntlet) + Timescale
+                    if self.is_score_gauntlet and v_key_upper == "TIMESCALE":
+                        # Multiply HP (Slow down = Lower HP); delays are multiplied so game time matches real time
+                        if key_lower == "maxhealth":
+                            ops.append((kl.index, kl.key, base_profile.get("MaxHealth", 0), "mul", ".5f", True))
+                        elif key_lower in RESPAWN_DELAY_KEYS:
+                            ops.append((kl.index, kl.key, base_profile.get(kl.key, 0), "mul", ".5f", True))
+
+                    # C. Special Logic: Type 2 (Degen Gauntlet)
+                    if self.is_degen_gauntlet:
+                        if v_key_upper == "TIMESCALE":
+                            if key_lower == "healthregenpersec":
+                                base_regen = base_profile.get("HealthRegenPerSec", 0)
+                                if base_regen < 0: ops.append((kl.index, kl.key, base_regen, "div", ".5f", True))
+                            elif key_lower in RESPAWN_DELAY_KEYS:
+                                ops.append((kl.index, kl.key, base_profile.get(kl.key, 0), "mul", ".5f", True))
+                        # Duration -> Scale HP & Delays (Preserve Density)
+                        elif v_key_upper == "DURATION":
+                            if key_lower == "maxhealth":
+                                ops.append((kl.index, kl.key, base_profile.get("MaxHealth", 0), "compress", ".5f", False))
+                            elif key_lower in RESPAWN_DELAY_KEYS:
+                                ops.append((kl.index, kl.key, base_profile.get(kl.key, 0), "compress", ".5f", False))
+        return ops
+
+    def render(self, v_key_upper, new_value, new_scenario_name):
+        """Returns a patched copy of the base lines for one variant value."""
+        multiplier = new_value / 100.0
+        new_timelimit_value = 0
+        score_ratio = 1.0
+
         if v_key_upper == "DURATION":
-            print(f"   ⏩ Skipped DURATION for {user_provided_name} (Type 1: Score Gauntlet)")
-            return "skipped_incompatible"
-        if v_key_upper == "HP":
-            print(f"   ⏩ Skipped HP for {user_provided_name} (Type 1: Score Gauntlet)")
-            return "skipped_incompatible"
+            # Logic for existing Timescale in base scenario
+            if self.base_timescale > 0 and self.base_timescale != 1.0:
+                base_perceived_duration = self.base_timelimit / self.base_timescale
+                score_ratio = base_perceived_duration / new_value if new_value > 0 else 1.0
+                duration_multiplier = new_value / base_perceived_duration if base_perceived_duration > 0 else 1.0
+                new_timelimit_value = self.base_timelimit * duration_multiplier
+            else:
+                score_ratio = self.base_timelimit / new_value if new_value > 0 else 1.0
+                new_timelimit_value = float(new_value)
+        compression_ratio = 1.0 / score_ratio if score_ratio > 0 else 1.0
 
-    if is_degen_gauntlet:
-        if v_key_upper == "HP" or v_key_upper == "REGEN_RATE":
-            print(f"   ⏩ Skipped {v_key_upper} for {user_provided_name} (Type 2: Degen Gauntlet)")
-            return "skipped_incompatible"
+        lines = self.lines[:]
+        for index, key in self.name_lines: lines[index] = f"{key}={new_scenario_name}\n"
+        for index, key, base_val, kind, fmt, needs_positive in self.ops_for(v_key_upper):
+            if needs_positive and not multiplier > 0: continue
+            if kind == "mul": new_val = base_val * multiplier
+            elif kind == "div": new_val = base_val / multiplier
+            elif kind == "score": new_val = base_val * score_ratio
+            elif kind == "compress": new_val = base_val * compression_ratio
+            else: new_val = new_timelimit_value
+            lines[index] = f"{key}={new_val:{fmt}}\n"
+        return lines
+
+def get_variant_plan(base_data, selected_bots):
+    """Returns the VariantPlan for this scenario + bot selection, compiling it on first use."""
+    plans = base_data.setdefault("variant_plans", {})
+    plan_key = frozenset(selected_bots)
+    if plan_key not in plans: plans[plan_key] = VariantPlan(base_data, selected_bots)
+    return plans[plan_key]
+
+def render_variant(base_data, variant_type_key, new_value, variant_configs, selected_bots, plan=None, log=print, new_scenario_name=None):
+    """Returns (result, new_scenario_name, lines). lines is None unless the variant can be written."""
+    user_provided_name = base_data['user_provided_name'].strip()
+    v_key_upper = variant_type_key.upper()
+    if plan is None: plan = get_variant_plan(base_data, selected_bots)
+
+    # --- SKIP LOGIC ---
+    skip_reason = plan.skip_reason(v_key_upper)
+    if skip_reason:
+        log(f"   ⏩ Skipped {v_key_upper} for {user_provided_name} ({skip_reason})")
+        return "skipped_incompatible", None, None
 
     # --- SETUP FILENAMES ---
-    new_scenario_name = calculate_target_filename(user_provided_name, variant_type_key, new_value, variant_configs)
+    if new_scenario_name is None: new_scenario_name = calculate_target_filename(user_provided_name, variant_type_key, new_value, variant_configs)
+
+    if v_key_upper == "DURATION" and plan.base_timelimit <= 0: return "error_timelimit", new_scenario_name, None
+    if not plan.name_lines:
+         return "name_not_found", new_scenario_name, None
+
+    with span("transform"): lines = plan.render(v_key_upper, new_value, new_scenario_name)
+    return None, new_scenario_name, lines
+
+def render_composite(base_data, steps, variant_configs, selected_bots, log=print, prefixes=None):
+    """
+    Like render_variant for a list of (variant_type, value) steps: each step is rendered from the previous
+    step's lines, re-tokenized in memory, so the result is byte-identical to generating the first variant,
+    loading it and generating the next one from it - without the intermediate files.
+    prefixes (a dict per scenario + bot selection) keeps intermediate steps shared between combinations.
+    """
+    naming = get_naming_engine(variant_configs)
+    data, name = base_data, base_data['user_provided_name'].strip()
+    for i, (vtype, value) in enumerate(steps):
+        is_last = i == len(steps) - 1
+        prefix = tuple(steps[:i + 1])
+        if not is_last and prefixes is not None and prefix in prefixes:
+            data, name = prefixes[prefix]; continue
+        result, name, lines = render_variant(data, vtype, value, variant_configs, selected_bots, log=log, new_scenario_name=naming.target_name(name, vtype, value))
+        if lines is None or is_last: return result, name, lines
+        data = tokenize_scenario(lines).to_scenario_data()
+        data["user_provided_name"] = name
+        if prefixes is not None: prefixes[prefix] = (data, name)
+
+def create_variant_file(base_data, folder_path, variant_type_key, new_value, variant_configs, selected_bots, plan=None, log=print):
+    result, new_scenario_name, lines = render_variant(base_data, variant_type_key, new_value, variant_configs, selected_bots, plan, log)
+    if lines is None: return result
     new_filename = os.path.join(folder_path, new_scenario_name + ".sce")
-    
-    lines = base_data["all_lines"][:]
-    found_name = False
-    current_profile_name = None
-    in_char_profile_section = False
-    in_any_section = False
-    player_name = base_data.get("player_profile_name")
-    
-    new_timelimit_value = 0
-    score_ratio = 1.0 
-    
-    # --- PRE-CALCULATIONS ---
-    if v_key_upper == "DURATION":
-        base_timelimit = base_data['global_properties'].get("Timelimit", 0)
-        base_timescale = base_data['global_properties'].get("Timescale", 1.0)
-        
-        if base_timelimit <= 0: return "error_timelimit"
-        
-        # Logic for existing Timescale in base scenario
-        if base_timescale > 0 and base_timescale != 1.0:
-            base_perceived_duration = base_timelimit / base_timescale
-            score_ratio = base_perceived_duration / new_value if new_value > 0 else 1.0
-            duration_multiplier = new_value / base_perceived_duration if base_perceived_duration > 0 else 1.0
-            new_timelimit_value = base_timelimit * duration_multiplier
-        else:
-            score_ratio = base_timelimit / new_value if new_value > 0 else 1.0
-            new_timelimit_value = float(new_value)
-            
-    # --- PROCESS LINES ---
-    for i, line in enumerate(lines):
-        line_strip = line.strip()
-        if line_strip.startswith('['):
-            in_any_section = True
-            if line_strip.lower() == "[character profile]": 
-                in_char_profile_section = True
-                current_profile_name = None
-            else: 
-                in_char_profile_section = False
-            continue
-            
-        if '=' not in line: continue
-        key_raw, value_raw = line.split('=', 1)
-        key_strip = key_raw.strip()
-        key_lower = key_strip.lower()
-        
-        # 1. Update Scenario Name
-        if not in_any_section and key_lower == "name" and value_raw.strip().lower() == internal_name_to_replace.lower():
-            lines[i] = f"{key_strip}={new_scenario_name}\n"
-            found_name = True
-            continue
-            
-        # 2. Global Properties
-        if not in_any_section:
-            # DURATION
-            if v_key_upper == "DURATION":
-                if key_lower == "timelimit": 
-                    lines[i] = f"{key_strip}={new_timelimit_value:.1f}\n"
-                if key_lower in ["scoreperhit", "scoreperdamage", "scoreperkill"]:
-                    base_val = base_data['global_properties'].get(key_strip, 0)
-                    if base_val > 0: lines[i] = f"{key_strip}={base_val * score_ratio:.3f}\n"
-            
-            # TIMESCALE
-            elif v_key_upper == "TIMESCALE":
-                if key_lower in [p.lower() for p in config['properties']]:
-                    base_val = base_data['global_properties'].get(key_strip, 1.0)
-                    lines[i] = f"{key_strip}={base_val * multiplier:.3f}\n"
-                elif key_lower == "timelimit":
-                    base_val = base_data['global_properties'].get("Timelimit", 0)
-                    if base_val > 0: lines[i] = f"{key_strip}={base_val * multiplier:.1f}\n"
-                
-                # Type 1 Fix: ScorePerTime
-                elif key_lower == "scorepertime" and is_score_gauntlet and multiplier > 0:
-                     base_val = base_data['global_properties'].get("ScorePerTime", 0)
-                     lines[i] = f"{key_strip}={base_val / multiplier:.3f}\n"
-
-                # Standard Scoring
-                elif key_lower in ["scoreperhit", "scoreperdamage", "scoreperkill"] and multiplier > 0:
-                    base_val = base_data['global_properties'].get(key_strip, 0)
-                    if base_val > 0: lines[i] = f"{key_strip}={base_val / multiplier:.3f}\n"
-
-        # 3. Character Profile Logic
-        # We separate checking if we ARE in a bot section vs if we should apply STANDARD logic
-        is_target_bot = False
-        if in_char_profile_section:
-            if key_lower == "name": current_profile_name = value_raw.strip()
-            if current_profile_name and current_profile_name in selected_bots:
-                is_target_bot = True
-
-        if is_target_bot:
-            # A. Standard Logic (Only if config scope matches)
-            if config['scope'] == 'Character Profile':
-                # Skip MaxHealth standard edit if we are overriding it below
-                should_skip_standard = False
-                if key_lower == "maxhealth":
-                    if (is_score_gauntlet and v_key_upper == "TIMESCALE") or (is_degen_gauntlet and v_key_upper == "DURATION"):
-                        should_skip_standard = True
-
-                if not should_skip_standard and key_lower in [p.lower() for p in config['properties']]:
-                    if config['mod_type'] == 'Multiplier':
-                        base_val = base_data["character_profiles"].get(current_profile_name, {}).get(key_strip, 0)
-                        should_modify = not (config['condition'] == "value > 0" and not base_val > 0)
-                        if should_modify: lines[i] = f"{key_strip}={base_val * multiplier:.5f}\n"
-                    elif config['mod_type'] == 'Calculated':
-                        calc_base_prop = config['calculation_base']
-                        base_val = base_data["character_profiles"].get(current_profile_name, {}).get(calc_base_prop, 0)
-                        lines[i] = f"{key_strip}={base_val * multiplier:.5f}\n"
-
-            # B. Special Logic: Type 1 (Score Gauntlet) + Timescale
-            # We explicitly check the Variant Key, independent of config scope
-            if is_score_gauntlet and v_key_upper == "TIMESCALE" and multiplier > 0:
-                if key_lower == "maxhealth":
-                    base_hp = base_data["character_profiles"].get(current_profile_name, {}).get("MaxHealth", 0)
-                    # CORRECTION: Multiply HP (Slow down = Lower HP)
-                    lines[i] = f"{key_strip}={base_hp * multiplier:.5f}\n"
-                elif key_lower in ["minrespawndelay", "maxrespawndelay"]:
-                    base_delay = base_data["character_profiles"].get(current_profile_name, {}).get(key_strip, 0)
-                    # Delay is multiplied (Slow down = Longer wait in game time to equal Real Time)
-                    lines[i] = f"{key_strip}={base_delay * multiplier:.5f}\n"
-
-            # C. Special Logic: Type 2 (Degen Gauntlet)
-            if is_degen_gauntlet:
-                if v_key_upper == "TIMESCALE" and multiplier > 0:
-                    if key_lower == "healthregenpersec":
-                        base_regen = base_data["character_profiles"].get(current_profile_name, {}).get("HealthRegenPerSec", 0)
-                        if base_regen < 0:
-                            lines[i] = f"{key_strip}={base_regen / multiplier:.5f}\n"
-                    elif key_lower in ["minrespawndelay", "maxrespawndelay"]:
-                        base_delay = base_data["character_profiles"].get(current_profile_name, {}).get(key_strip, 0)
-                        lines[i] = f"{key_strip}={base_delay * multiplier:.5f}\n"
-                
-                # Duration -> Scale HP & Delays (Preserve Density)
-                elif v_key_upper == "DURATION":
-                    compression_ratio = 1.0 / score_ratio if score_ratio > 0 else 1.0
-                    
-                    if key_lower == "maxhealth":
-                        base_hp = base_data["character_profiles"].get(current_profile_name, {}).get("MaxHealth", 0)
-                        lines[i] = f"{key_strip}={base_hp * compression_ratio:.5f}\n"
-                    elif key_lower in ["minrespawndelay", "maxrespawndelay"]:
-                        base_delay = base_data["character_profiles"].get(current_profile_name, {}).get(key_strip, 0)
-                        lines[i] = f"{key_strip}={base_delay * compression_ratio:.5f}\n"
-
-    if not found_name:
-         return "name_not_found"
     try:
-        with open(new_filename, 'w', encoding='utf-8') as f: f.writelines(lines)
-        print(f"✅ Created: {new_scenario_name}.sce")
+        with span("write"):
+            data = encode_lines(lines)
+            unchanged = same_content(new_filename, data)
+            if not unchanged: write_atomic(new_filename, data)
+        if unchanged:
+            log(f"➖ Unchanged: {new_scenario_name}.sce")
+            return "unchanged"
+        log(f"✅ Created: {new_scenario_name}.sce")
         return "success"
     except Exception as e:
-        print(f"❌ ERROR creating {new_filename}: {e}")
-        return "error"
\ No newline at end of file
+        log(f"❌ ERROR creating {new_filename}: {e}")
+        return "error"
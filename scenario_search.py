@@ -0,0 +1,209 @@
+# scenario_search.py
+import heapq
+import bisect
+import itertools
+
+FUZZY_MIN_RESULTS = 10     # only look for fuzzy matches when the exact tiers return fewer names than this
+FUZZY_MIN_TOKEN = 3        # shorter tokens must match as substrings
+FUZZY_MAX_WORDS = 200      # vocabulary words checked per query token, most shared letter pairs first
+FUZZY_MAX_CANDIDATES = 5000
+FUZZY_LIMIT = 50
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def letter_pairs(text):
+    """Unordered adjacent letter pairs: "frenzy" and "frnezy" still share most of them."""
+    return {a + b if a <= b else b + a for a, b in zip(text, text[1:])}
+
+def max_typos(token):
+    return 1 if len(token) <= 6 else 2
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (a transposition counts as one edit), or limit + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            d = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]: d = min(d, before[j - 2] + 1)
+            current[j] = d
+        if min(current) > limit: return limit + 1
+    return current[-1]
+
+class ScenarioSearch:
+    """
+    Sorted scenario names with cached lowercase keys and a trigram index.
+
+    search() ranks names in three tiers, alphabetical within each:
+      1. the whole query is a substring (the original search box behaviour)
+      2. every whitespace-separated token is a substring, in any order ("1w4ts small")
+      3. fuzzy: every token is a substring or a word of the name within one or two edits,
+         transpositions included ("frnezy" finds "Frenzy")
+    Selective queries are answered from trigram postings; broad ones fall back to one pass
+    over the sorted keys, refining the previous result while the query only grows. The fuzzy tier
+    works on the folder's word vocabulary, found through unordered letter-pair postings.
+    """
+    def __init__(self, names=()):
+        self.set_names(names)
+
+    def set_names(self, names):
+        self.names = sorted(names, key=str.lower)
+        self.keys = [name.lower() for name in self.names]   # parallel sort keys, also used for matching
+        self.name_set = set(self.names)
+        self.postings = {}                                   # trigram -> set of names
+        self.word_names = {}                                 # lowercase word -> set of names containing it
+        self.word_pairs = {}                                 # letter pair -> set of words
+        for name, key in zip(self.names, self.keys): self._index(name, key)
+        self._reset_refinement()
+
+    def _index(self, name, key):
+        for gram in trigrams(key): self.postings.setdefault(gram, set()).add(name)
+        for word in set(key.split()):
+            holders = self.word_names.get(word)
+            if holders is None:
+                holders = self.word_names[word] = set()
+                for pair in letter_pairs(word): self.word_pairs.setdefault(pair, set()).add(word)
+            holders.add(name)
+
+    def _unindex(self, name, key):
+        for gram in trigrams(key):
+            posting = self.postings.get(gram)
+            if posting is None: continue
+            posting.discard(name)
+            if not posting: del self.postings[gram]
+        for word in set(key.split()):
+            holders = self.word_names.get(word)
+            if holders is None: continue
+            holders.discard(name)
+            if holders: continue
+            del self.word_names[word]
+            for pair in letter_pairs(word):
+                words = self.word_pairs.get(pair)
+                if words is None: continue
+                words.discard(word)
+                if not words: del self.word_pairs[pair]
+
+    def _reset_refinement(self):
+        self.last_query = None
+        self.last_matches = None   # positions (sorted) matched by last_query's first two tiers
+
+    def __len__(self): return len(self.names)
+    def __contains__(self, name): return name in self.name_set
+
+    def add(self, name):
+        """Inserts a name in sort order. Returns its index, or None if it was already present."""
+        if name in self.name_set: return None
+        key = name.lower()
+        index = bisect.bisect_right(self.keys, key)
+        self.names.insert(index, name); self.keys.insert(index, key); self.name_set.add(name)
+        self._index(name, key)
+        self._reset_refinement()
+        return index
+
+    def remove(self, name):
+        """Removes a name. Returns its former index, or None if it wasn't present."""
+        if name not in self.name_set: return None
+        index = bisect.bisect_left(self.keys, name.lower())
+        while self.names[index] != name: index += 1
+        self._unindex(name, self.keys[index])
+        del self.names[index]; del self.keys[index]; self.name_set.discard(name)
+        self._reset_refinement()
+        return index
+
+    def _candidates(self, tokens):
+        """Names that contain every trigram of every 3+ char token, or None if no token is long enough."""
+        grams = set()
+        for token in tokens:
+            if len(token) >= 3: grams |= trigrams(token)
+        if not grams: return None
+        postings = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        if not postings[0]: return set()
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result: break
+        return result
+
+    def search(self, query, fuzzy=True):
+        """
+        Ranked list of matching names (see class docstring). An empty query returns every name.
+        fuzzy=False skips tier 3; the search box uses that per keystroke and adds it once typing settles.
+        """
+        query = query.lower()
+        tokens = query.split()
+        if not tokens: return list(self.names)
+
+        candidates = self._candidates(tokens)
+        if candidates is not None and len(candidates) <= len(self.names) // 8:
+            # Selective query: only verify the trigram candidates
+            exact, multi = [], []
+            for name in sorted(candidates, key=str.lower):
+                key = name.lower()
+                if query in key: exact.append(name)
+                elif all(token in key for token in tokens): multi.append(name)
+            self._reset_refinement()
+        else:
+            # Broad query: one pass over the sorted keys, or over the previous matches if the query only grew
+            if self.last_query is not None and self.last_query in query: positions = self.last_matches
+            else: positions = range(len(self.keys))
+            keys = self.keys
+            exact_pos = [i for i in positions if query in keys[i]]
+            multi_pos = []
+            if len(tokens) > 1 or tokens[0] != query:
+                # Token filters as flat comprehensions; a per-key all() generator is several times slower
+                multi_pos = [i for i in positions if query not in keys[i]]
+                for token in tokens: multi_pos = [i for i in multi_pos if token in keys[i]]
+            self.last_query, self.last_matches = query, sorted(exact_pos + multi_pos)
+            exact = [self.names[i] for i in exact_pos]; multi = [self.names[i] for i in multi_pos]
+
+        results = exact + multi
+        if fuzzy and len(results) < FUZZY_MIN_RESULTS:
+            results += self._fuzzy(tokens, exclude=set(results))
+        return results
+
+    def _similar_words(self, token):
+        """{word: edits} for vocabulary words (or their prefixes, for a half-typed word) close to token."""
+        limit = max_typos(token)
+        postings = sorted((self.word_pairs.get(pair, set()) for pair in letter_pairs(token)), key=len)
+        # Each edit changes at most two letter pairs, and a word sharing `needed` of them
+        # must be in one of the len - needed + 1 rarest postings
+        needed = max(1, len(postings) - 2 * limit)
+        candidates = {word for word in set().union(*postings[:len(postings) - needed + 1]) if len(word) >= len(token) - limit}
+        shared = [(sum(word in posting for posting in postings), word) for word in candidates]
+        shared = sorted((item for item in shared if item[0] >= needed), reverse=True)[:FUZZY_MAX_WORDS]
+        similar = {}
+        for _, word in shared:
+            edits = edit_distance(token, word, limit)
+            if edits > limit and len(word) > len(token): edits = edit_distance(token, word[:len(token)], limit)
+            if edits <= limit: similar[word] = edits
+        return similar
+
+    def _fuzzy(self, tokens, exclude):
+        fuzzy_tokens = [token for token in tokens if len(token) >= FUZZY_MIN_TOKEN]
+        if not fuzzy_tokens: return []
+        # Per token: the edits of each name holding a similar word. Names come from the rarest token's words.
+        best = []
+        for token in fuzzy_tokens:
+            edits_by_name = {}
+            for word, edits in self._similar_words(token).items():
+                for name in self.word_names[word]:
+                    if edits < edits_by_name.get(name, edits + 1): edits_by_name[name] = edits
+            best.append(edits_by_name)
+        seed_index = min(range(len(best)), key=lambda i: len(best[i]))
+        others = [(token, edits_by_name) for i, (token, edits_by_name) in enumerate(zip(fuzzy_tokens, best)) if i != seed_index]
+        short = [token for token in tokens if len(token) < FUZZY_MIN_TOKEN]   # short tokens take no typos
+        scored = []
+        for name, total in itertools.islice(best[seed_index].items(), FUZZY_MAX_CANDIDATES):
+            if name in exclude: continue
+            key = name.lower()
+            for token, edits_by_name in others:
+                if token in key: continue
+                edits = edits_by_name.get(name)
+                if edits is None: break
+                total += edits
+            else:
+                if all(token in key for token in short): scored.append((total, key, name))
+        return [name for _, _, name in heapq.nsmallest(FUZZY_LIMIT, scored)]
@@ -0,0 +1,37 @@
+# tests/test_scenario_search.py
+#   python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scenario_search import ScenarioSearch, edit_distance
+
+NAMES = ["1w4ts Voltaic Frenzy", "Air Frenzy Small", "Pasu Reload", "Smooth Sphere", "Tile Frenzy 90%", "Voltaic Static Wide"]
+
+def test_transposed_letters_find_the_word():
+    results = ScenarioSearch(NAMES).search("frnezy")
+    assert results[:3] == ["1w4ts Voltaic Frenzy", "Air Frenzy Small", "Tile Frenzy 90%"]
+
+def test_typos_in_several_tokens():
+    assert ScenarioSearch(NAMES).search("voltiac frenzy") == ["1w4ts Voltaic Frenzy"]
+    assert ScenarioSearch(NAMES).search("smoth spehre") == ["Smooth Sphere"]
+
+def test_half_typed_word_with_a_typo():
+    assert "Pasu Reload" in ScenarioSearch(NAMES).search("relao")
+
+def test_exact_tiers_come_first_and_fuzzy_can_be_skipped():
+    search = ScenarioSearch(NAMES)
+    assert search.search("frenzy")[:3] == ["1w4ts Voltaic Frenzy", "Air Frenzy Small", "Tile Frenzy 90%"]
+    assert search.search("frnezy", fuzzy=False) == []
+
+def test_removed_names_leave_the_vocabulary():
+    search = ScenarioSearch(NAMES)
+    search.remove("Pasu Reload")
+    assert "pasu" not in search.word_names and search.search("psau") == []
+    search.add("Pasu Reload")
+    assert search.search("psau") == ["Pasu Reload"]
+
+def test_edit_distance_counts_a_transposition_once():
+    assert edit_distance("frnezy", "frenzy", 2) == 1
+    assert edit_distance("tile", "tile", 1) == 0
+    assert edit_distance("abc", "xyz", 1) == 2   # capped at limit + 1
@@ -0,0 +1,77 @@
+# timing.py
+# Lightweight timing spans for generation runs. Disabled by default: span() then returns a shared
+# no-op object, so instrumented code pays one call and an attribute check.
+#   with span("parse"): ...
+import json
+import time
+import threading
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("recorder", "name", "start")
+    def __init__(self, recorder, name): self.recorder = recorder; self.name = name
+    def __enter__(self): self.start = time.perf_counter(); return self
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, time.perf_counter() - self.start)
+        return False
+
+def percentile(sorted_values, q):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+class TimingRecorder:
+    """Collects span durations per phase name. Thread-safe; samples from worker processes come in via merge()."""
+    def __init__(self):
+        self.enabled = False
+        self.samples = {}   # phase name -> [seconds, ...]
+        self.lock = threading.Lock()
+
+    def enable(self, enabled=True): self.enabled = enabled
+    def reset(self):
+        with self.lock: self.samples = {}
+
+    def span(self, name): return _Span(self, name) if self.enabled else NULL_SPAN
+
+    def add(self, name, seconds):
+        with self.lock: self.samples.setdefault(name, []).append(seconds)
+
+    def snapshot(self):
+        with self.lock: return {name: list(values) for name, values in self.samples.items()}
+
+    def merge(self, samples):
+        with self.lock:
+            for name, values in samples.items(): self.samples.setdefault(name, []).extend(values)
+
+    def summary(self, files=None, elapsed=None):
+        """Per-phase totals and per-call p50/p95, plus files/s for the run."""
+        phases = {}
+        for name, values in sorted(self.snapshot().items()):
+            values.sort()
+            phases[name] = {"count": len(values), "total_s": round(sum(values), 6),
+                            "p50_ms": round(percentile(values, 0.5) * 1000, 3), "p95_ms": round(percentile(values, 0.95) * 1000, 3)}
+        summary = {"phases": phases, "files": files, "elapsed_s": round(elapsed, 6) if elapsed is not None else None}
+        summary["files_per_s"] = round(files / elapsed, 1) if files and elapsed else None
+        return summary
+
+    def report(self, files=None, elapsed=None):
+        summary = self.summary(files, elapsed)
+        lines = [f"{'Phase':<16}{'Calls':>8}{'Total s':>10}{'p50 ms':>10}{'p95 ms':>10}"]
+        for name, p in summary["phases"].items():
+            lines.append(f"{name:<16}{p['count']:>8}{p['total_s']:>10.3f}{p['p50_ms']:>10.3f}{p['p95_ms']:>10.3f}")
+        if summary["files_per_s"] is not None: lines.append(f"{files} files in {elapsed:.2f}s ({summary['files_per_s']} files/s)")
+        return "\n".join(lines)
+
+    def export_json(self, path, files=None, elapsed=None, **extra):
+        summary = self.summary(files, elapsed)
+        summary.update(extra)
+        with open(path, 'w', encoding='utf-8') as f: json.dump(summary, f, indent=4)
+
+TIMINGS = TimingRecorder()
+
+def span(name): return TIMINGS.span(name)
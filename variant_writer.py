@@ -0,0 +1,180 @@
+# variant_writer.py
+# Atomic .sce writes: every file goes to a temp file in the target folder and is committed with os.replace,
+# so a crash or a locked file never leaves a truncated scenario behind.
+import os
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from timing import span
+
+DURABILITY_MODES = ("none", "batch", "file")   # fsync: never / once per batch before committing / every file
+WRITER_THREADS = 4
+REPLACE_RETRIES = 5       # antivirus and the game itself can briefly hold the target open on Windows
+REPLACE_RETRY_DELAY = 0.05
+
+_pool = None
+_pool_lock = threading.Lock()
+_temp_counter = itertools.count()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None: _pool = ThreadPoolExecutor(max_workers=WRITER_THREADS, thread_name_prefix="variant-writer")
+        return _pool
+
+def encode_lines(lines):
+    """Same bytes text mode open(..., 'w', encoding='utf-8') would write."""
+    data = "".join(lines)
+    if os.linesep != "\n": data = data.replace("\n", os.linesep)
+    return data.encode("utf-8")
+
+def temp_path_for(path):
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}.{os.getpid()}.{next(_temp_counter)}.tmp")
+
+def replace_with_retry(src, dst):
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1: raise
+            time.sleep(REPLACE_RETRY_DELAY * (attempt + 1))
+
+def _discard(path):
+    try: os.remove(path)
+    except OSError: pass
+
+def _fsync_path(path, flags=os.O_RDWR):
+    fd = os.open(path, flags)
+    try: os.fsync(fd)
+    finally: os.close(fd)
+
+def _fsync_folder(folder):
+    # Makes the renames themselves durable; directories can't be opened on Windows
+    if os.name == "nt": return
+    try: _fsync_path(folder, os.O_RDONLY)
+    except OSError: pass
+
+def same_content(path, data):
+    """True if the file at path already holds exactly these bytes. Size is checked before reading."""
+    try:
+        if os.stat(path).st_size != len(data): return False
+        with open(path, "rb") as f: return f.read() == data
+    except OSError: return False
+
+def write_atomic(path, data, fsync=False):
+    """Writes bytes to path through a temp file + os.replace."""
+    tmp = temp_path_for(path)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if fsync: f.flush(); os.fsync(f.fileno())
+        replace_with_retry(tmp, path)
+    except BaseException:
+        _discard(tmp)
+        raise
+
+@dataclass
+class WriteStats:
+    files: int = 0
+    bytes: int = 0
+    unchanged: int = 0     # targets that already held identical bytes and were left alone
+    failures: int = 0
+    seconds: float = 0.0   # wall time from the first submit to the end of the last flush
+
+    def merge(self, other):
+        self.files += other.files; self.bytes += other.bytes; self.unchanged += other.unchanged
+        self.failures += other.failures; self.seconds += other.seconds
+        return self
+
+    def __str__(self):
+        rate = self.files / self.seconds if self.seconds > 0 else 0
+        return f"Writer: {self.files} files, {self.bytes / 1048576:.1f} MB, {self.unchanged} unchanged, {self.failures} failed, {rate:.0f} files/s"
+
+class VariantWriter:
+    """
+    Queues variant files on a shared thread pool so disk writes overlap with rendering.
+    submit() returns a Future that resolves to the byte count, or raises the write error.
+    With skip_unchanged, a target that already holds the same bytes is not rewritten and
+    its Future resolves to None. In "batch" mode temp files are only fsynced and committed
+    by flush(), all at once.
+
+        with VariantWriter("batch") as writer:
+            future = writer.submit(path, lines)
+        future.result()
+    """
+    def __init__(self, durability="none", skip_unchanged=True):
+        if durability not in DURABILITY_MODES: raise ValueError(f"Unknown durability mode: {durability}")
+        self.durability = durability
+        self.skip_unchanged = skip_unchanged
+        self.futures = []    # (path, Future)
+        self.staged = []     # batch mode: (temp path, final path) written but not yet committed
+        self.lock = threading.Lock()
+        self.stats = WriteStats()
+        self.started = None
+        self.write_seconds = {}   # path -> time its writer thread spent on it
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.flush()
+
+    def submit(self, path, lines):
+        if self.started is None: self.started = time.perf_counter()
+        future = _get_pool().submit(self._write, path, lines)
+        self.futures.append((path, future))
+        return future
+
+    def _write(self, path, lines):
+        start = time.perf_counter()
+        try:
+            with span("write"): return self._write_file(path, lines)
+        finally:
+            with self.lock: self.write_seconds[path] = time.perf_counter() - start
+
+    def _write_file(self, path, lines):
+        data = encode_lines(lines)
+        if self.skip_unchanged and same_content(path, data): return None
+        if self.durability != "batch":
+            write_atomic(path, data, fsync=self.durability == "file")
+            return len(data)
+        tmp = temp_path_for(path)
+        try:
+            with open(tmp, "wb") as f: f.write(data)
+        except BaseException:
+            _discard(tmp)
+            raise
+        with self.lock: self.staged.append((tmp, path))
+        return len(data)
+
+    def _commit(self, staged):
+        """fsyncs every staged temp file, then renames them all into place. Returns {path: error}."""
+        failed = {}
+        for tmp, path in staged:
+            try: _fsync_path(tmp)
+            except OSError as e: failed[path] = e
+        for tmp, path in staged:
+            try:
+                if path in failed: raise failed[path]
+                replace_with_retry(tmp, path)
+            except OSError as e: _discard(tmp); failed[path] = e
+        _fsync_folder(os.path.dirname(staged[0][1]) or ".")
+        return failed
+
+    def flush(self):
+        """Waits for every submitted write, commits staged batch files and updates stats."""
+        futures, self.futures = self.futures, []
+        with span("write.wait"): ok = [(path, f) for path, f in futures if f.exception() is None]   # blocks until each write is done
+        failed = {}
+        if self.staged:
+            with self.lock: staged, self.staged = self.staged, []
+            with span("write.commit"): failed = self._commit(staged)
+        unchanged = sum(1 for _, f in ok if f.result() is None)
+        self.stats.unchanged += unchanged
+        self.stats.files += len(ok) - len(failed) - unchanged
+        self.stats.bytes += sum(f.result() or 0 for path, f in ok if path not in failed)
+        self.stats.failures += len(futures) - len(ok) + len(failed)
+        if self.started is not None: self.stats.seconds += time.perf_counter() - self.started; self.started = None
+        return failed   # batch commits that failed after their write succeeded: {path: error}